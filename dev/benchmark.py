@@ -0,0 +1,708 @@
+"""End-to-end benchmark for the Git Update service.
+
+Generates a synthetic repository in a local bare repo, then drives
+`GitUpdateService` through an initial sync, a series of incremental syncs
+(one per generated commit) and idle syncs. Home Assistant and MQTT are
+replaced by in-process stand-ins listening on localhost, so the run needs no
+network access. With `--maintenance` the local repository is then
+maintained and the syncs are repeated, to compare fetch and diff latency
+before and after. With `--drift` the drift monitor runs with
+`drift_policy: redeploy`, and after each of `--commits` further syncs
+some just-deployed files are edited by hand to time their repair.
+`--partial-clone` syncs a blobless clone whose `include_paths` name one
+generated file and one directory literally, i.e. a sparse checkout.
+
+The result is a JSON document with per-phase latency percentiles,
+throughput, peak RSS and the size of the local repository. Pass an earlier result via `--baseline` to include
+the relative change of every percentile.
+
+    python dev/benchmark.py --files 5000 --commits 20 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+APP_DIR = Path(__file__).resolve().parent.parent / "git-update" / "rootfs" / "app"
+RESULT_VERSION = 1
+_GIT_IDENTITY = ["-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost"]
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# Files edited after each drift round, and how long a repair may take.
+_DRIFT_EDITS = 5
+_DRIFT_TIMEOUT = 15.0
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    repo = parser.add_argument_group("synthetic repository")
+    repo.add_argument("--files", type=int, default=2000, help="files in the initial tree")
+    repo.add_argument("--directories", type=int, default=40, help="directories to spread files over")
+    repo.add_argument("--file-size", type=int, default=1024, help="average file size in bytes")
+    repo.add_argument("--yaml-ratio", type=float, default=0.6, help="fraction of files that are YAML")
+    repo.add_argument("--commits", type=int, default=10, help="commits (and incremental syncs)")
+    repo.add_argument("--churn", type=float, default=0.02, help="fraction of files modified per commit")
+    repo.add_argument("--renames", type=float, default=0.005, help="fraction of files renamed per commit")
+    repo.add_argument("--adds", type=float, default=0.005, help="fraction of files added per commit")
+    repo.add_argument("--deletes", type=float, default=0.002, help="fraction of files deleted per commit")
+    repo.add_argument("--seed", type=int, default=1)
+    run = parser.add_argument_group("service")
+    run.add_argument("--idle-syncs", type=int, default=5, help="syncs without remote changes")
+    run.add_argument("--payload-mode", choices=("full", "summary", "chunked"), default="full")
+    run.add_argument("--deploy-workers", type=int, default=4)
+    run.add_argument("--no-atomic", action="store_true", help="disable staged deployments")
+    run.add_argument("--no-mqtt", action="store_true", help="do not publish to the MQTT stand-in")
+    run.add_argument("--mqtt-qos", type=int, choices=(0, 1, 2), default=1)
+    run.add_argument("--ha-transport", choices=("rest", "websocket"), default="rest")
+    run.add_argument("--ha-latency", type=float, default=0.0, help="seconds the HA stub waits per request")
+    run.add_argument("--git-depth", type=int, default=1, help="clone depth (0 for full history)")
+    run.add_argument("--bare", action="store_true", help="deploy from git objects (bare_repo)")
+    run.add_argument(
+        "--partial-clone",
+        action="store_true",
+        help="blobless clone including one generated file and one directory (partial_clone)",
+    )
+    run.add_argument(
+        "--maintenance",
+        action="store_true",
+        help="run git maintenance after the syncs, then repeat them to compare fetch/diff latency",
+    )
+    run.add_argument(
+        "--drift",
+        action="store_true",
+        help="edit files right after further syncs and time their repair (drift_policy: redeploy)",
+    )
+    out = parser.add_argument_group("output")
+    out.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    out.add_argument("--baseline", type=Path, help="earlier result to compare against")
+    out.add_argument("--workdir", type=Path, help="keep repositories and state in this directory")
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------------
+# Synthetic repository
+
+
+class SyntheticRepo:
+    """Working copy pushing generated commits to a local bare repository."""
+
+    def __init__(self, root: Path, args: argparse.Namespace) -> None:
+        self.bare = root / "remote.git"
+        self.work = root / "work"
+        self._args = args
+        self._rng = random.Random(args.seed)
+        self._directories = [
+            "/".join(f"d{self._rng.randrange(10 ** 6):06d}" for _ in range(1 + index % 3))
+            for index in range(max(args.directories, 1))
+        ]
+        self.files: list[str] = []
+        self.commits = 0
+        self.bytes = 0
+
+    def create(self) -> None:
+        self._git("init", "-q", "--bare", "-b", "main", str(self.bare))
+        # Serve --filter (partial clones) and fetches of single blobs.
+        self._git("-C", str(self.bare), "config", "uploadpack.allowFilter", "true")
+        self._git("-C", str(self.bare), "config", "uploadpack.allowAnySHA1InWant", "true")
+        self._git("init", "-q", "-b", "main", str(self.work))
+        for _ in range(self._args.files):
+            self.files.append(self._new_file())
+        self._commit_and_push("initial tree")
+
+    def mutate(self) -> dict[str, int]:
+        """Apply one commit worth of churn and push it."""
+
+        args, rng = self._args, self._rng
+        counts = Counter()
+        for path in rng.sample(self.files, min(len(self.files), _scaled(args.churn, len(self.files)))):
+            self._write(path)
+            counts["modified"] += 1
+        for _ in range(min(len(self.files), _scaled(args.renames, len(self.files)))):
+            old = self.files.pop(rng.randrange(len(self.files)))
+            new = self._path_for(Path(old).suffix)
+            (self.work / new).parent.mkdir(parents=True, exist_ok=True)
+            self._git("-C", str(self.work), "mv", old, new)
+            self.files.append(new)
+            counts["renamed"] += 1
+        for _ in range(min(len(self.files), _scaled(args.deletes, len(self.files)))):
+            old = self.files.pop(rng.randrange(len(self.files)))
+            (self.work / old).unlink()
+            counts["deleted"] += 1
+        for _ in range(_scaled(args.adds, max(len(self.files), 1))):
+            self.files.append(self._new_file())
+            counts["added"] += 1
+        self._commit_and_push(f"churn {self.commits}")
+        return dict(counts)
+
+    def _new_file(self) -> str:
+        suffix = ".yaml" if self._rng.random() < self._args.yaml_ratio else ".txt"
+        path = self._path_for(suffix)
+        self._write(path)
+        return path
+
+    def _path_for(self, suffix: str) -> str:
+        while True:
+            directory = self._rng.choice(self._directories)
+            path = f"{directory}/f{self._rng.randrange(10 ** 8):08d}{suffix}"
+            if not (self.work / path).exists():
+                return path
+
+    def _write(self, path: str) -> None:
+        size = max(16, int(self._rng.expovariate(1 / self._args.file_size)))
+        target = self.work / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if path.endswith(".yaml"):
+            lines, length = [], 0
+            while length < size:
+                line = f"key_{len(lines)}: value_{self._rng.randrange(10 ** 9)}\n"
+                lines.append(line)
+                length += len(line)
+            content = "".join(lines)
+        else:
+            content = "".join(self._rng.choices("abcdefghij \n", k=size))
+        target.write_text(content, encoding="utf-8")
+
+    def _commit_and_push(self, message: str) -> None:
+        self._git("-C", str(self.work), "add", "-A")
+        self._git("-C", str(self.work), *_GIT_IDENTITY, "commit", "-q", "-m", message)
+        self._git("-C", str(self.work), "push", "-q", str(self.bare), "main")
+        self.commits += 1
+        self.bytes = sum((self.work / path).stat().st_size for path in self.files)
+
+    @staticmethod
+    def _git(*args: str) -> None:
+        subprocess.run(["git", *args], check=True, stdout=subprocess.DEVNULL)
+
+
+def _scaled(ratio: float, total: int) -> int:
+    return int(round(ratio * total))
+
+
+# --------------------------------------------------------------------------
+# Home Assistant and MQTT stand-ins
+
+
+class StubHomeAssistant:
+    """Minimal HTTP/1.1 keep-alive server answering the HA REST calls we use.
+
+    `/api/websocket` upgrades to a websocket speaking just enough of the HA
+    websocket API (auth, `fire_event`, `call_service`) for `ha_transport`.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._latency = latency
+        self.requests: Counter[str] = Counter()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if path.endswith("/websocket") and "sec-websocket-key" in headers:
+                    await self._serve_websocket(reader, writer, headers["sec-websocket-key"])
+                    break
+                await reader.readexactly(int(headers.get("content-length", 0)))
+                if self._latency:
+                    await asyncio.sleep(self._latency)
+                if path.endswith("/check_config") or path.endswith("/core/check"):
+                    self.requests["check_config"] += 1
+                    body = b'{"result": "valid", "errors": null}'
+                else:
+                    self.requests["fire_event"] += 1
+                    body = b'{"message": "Event fired."}'
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_websocket(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: str
+    ) -> None:
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Accept: %s\r\n\r\n" % accept
+        )
+        writer.write(_ws_frame(b'{"type": "auth_required"}'))
+        replies: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                opcode, payload = await _ws_receive(reader)
+                if opcode == 0x8:
+                    writer.write(_ws_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(_ws_frame(payload, 0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                message = json.loads(payload)
+                if message.get("type") == "auth":
+                    writer.write(_ws_frame(b'{"type": "auth_ok"}'))
+                    continue
+                # Answer concurrently, like HA does, so commands overlap.
+                task = asyncio.get_running_loop().create_task(self._ws_reply(writer, message))
+                replies.add(task)
+                task.add_done_callback(replies.discard)
+        finally:
+            await asyncio.gather(*replies, return_exceptions=True)
+
+    async def _ws_reply(self, writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if message.get("service") == "check_config":
+            self.requests["check_config"] += 1
+        else:
+            self.requests[message.get("type", "unknown")] += 1
+        reply = {"id": message.get("id"), "type": "result", "success": True, "result": None}
+        writer.write(_ws_frame(json.dumps(reply).encode()))
+        await writer.drain()
+
+
+async def _ws_receive(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    head = await reader.readexactly(2)
+    length = head[1] & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if head[1] & 0x80 else b""
+    payload = await reader.readexactly(length)
+    if mask and length:
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+    return head[0] & 0x0F, payload
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class StubMqttBroker:
+    """Accepts MQTT 3.1.1 publishes (QoS 0-2) and counts them."""
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.bytes = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                multiplier, length = 1, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                packet_type = header >> 4
+                if packet_type == 1:  # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif packet_type == 3:  # PUBLISH
+                    qos = (header >> 1) & 0x03
+                    (topic_length,) = struct.unpack("!H", body[:2])
+                    offset = 2 + topic_length
+                    if qos:
+                        packet_id = body[offset : offset + 2]
+                        offset += 2
+                        writer.write((b"\x40" if qos == 1 else b"\x50") + b"\x02" + packet_id)
+                    self.messages += 1
+                    self.bytes += len(body) - offset
+                elif packet_type == 6:  # PUBREL
+                    writer.write(b"\x70\x02" + body[:2])
+                elif packet_type == 12:  # PINGREQ
+                    writer.write(b"\xd0\x00")
+                elif packet_type == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# --------------------------------------------------------------------------
+# Measurement
+
+
+class SampleRecorder:
+    """Keep raw observations of histograms so exact percentiles can be computed."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, dict[str, list[float]]] = {}
+
+    def attach(self, histogram: Any, key: str, label: str | None = None) -> None:
+        observe = histogram.observe
+        series = self.samples.setdefault(key, {})
+
+        def recording_observe(value: float, **labels: str) -> None:
+            series.setdefault(labels[label] if label else "all", []).append(value)
+            observe(value, **labels)
+
+        histogram.observe = recording_observe
+
+
+def summarize(values: Sequence[float]) -> dict[str, float | int]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": _percentile(ordered, 50),
+        "p90": _percentile(ordered, 90),
+        "p99": _percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def _percentile(ordered: Sequence[float], percent: float) -> float:
+    # Nearest-rank percentile: stable for small sample counts.
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def compare(current: Any, baseline: Any) -> Any:
+    """Relative change (current / baseline - 1) of every shared statistic."""
+
+    if isinstance(current, dict) and isinstance(baseline, dict):
+        result = {}
+        for key, value in current.items():
+            if key in baseline and key != "count":
+                diff = compare(value, baseline[key])
+                if diff not in (None, {}):
+                    result[key] = diff
+        return result
+    if isinstance(current, (int, float)) and isinstance(baseline, (int, float)) and baseline:
+        return round(current / baseline - 1, 4)
+    return None
+
+
+def _git_version() -> str:
+    output = subprocess.run(["git", "--version"], capture_output=True, text=True, check=False)
+    return output.stdout.strip()
+
+
+# --------------------------------------------------------------------------
+# Driver
+
+
+async def run(args: argparse.Namespace, root: Path) -> dict[str, Any]:
+    started_at = datetime.now(timezone.utc)
+    repo = SyntheticRepo(root, args)
+    started = time.perf_counter()
+    repo.create()
+    generate_seconds = time.perf_counter() - started
+
+    ha = StubHomeAssistant(args.ha_latency)
+    broker = StubMqttBroker()
+    ha_port = await ha.start()
+    mqtt_port = await broker.start()
+
+    os.environ["GIT_UPDATE_STATE_DIR"] = str(root / "state")
+    os.environ["GIT_UPDATE_REPO_DIR"] = str(root / "repo")
+    # Use the ha_base_url code path even when run inside a Supervisor container.
+    os.environ.pop("SUPERVISOR_TOKEN", None)
+    sys.path.insert(0, str(APP_DIR))
+    from git_update import metrics
+    from git_update.config import Options
+    from git_update.service import GitUpdateService
+
+    recorder = SampleRecorder()
+    recorder.attach(metrics.SYNC_PHASE_SECONDS, "phases", "phase")
+    recorder.attach(metrics.HA_REQUEST_SECONDS, "ha_requests", "endpoint")
+    recorder.attach(metrics.MQTT_PUBLISH_SECONDS, "mqtt_publish")
+
+    include_paths: list[str] = []
+    if args.partial_clone and repo.files:
+        # Literal patterns: a file (not a cone directory) and a directory.
+        include_paths = [repo.files[0], str(Path(repo.files[-1]).parent)]
+    options = Options(
+        repo_url=f"file://{repo.bare}",
+        branch="main",
+        target_path=str(root / "target"),
+        ha_access_token="benchmark",
+        ha_base_url=f"http://127.0.0.1:{ha_port}",
+        ha_transport=args.ha_transport,
+        poll_interval=3600,
+        notify_on_startup=True,
+        payload_mode=args.payload_mode,
+        deploy_workers=args.deploy_workers,
+        deploy_atomic=not args.no_atomic,
+        git_depth=args.git_depth,
+        bare_repo=args.bare,
+        partial_clone=args.partial_clone,
+        include_paths=include_paths,
+        drift_policy="redeploy" if args.drift else "off",
+        mqtt_enabled=not args.no_mqtt,
+        mqtt_host="127.0.0.1",
+        mqtt_port=mqtt_port,
+        mqtt_qos=args.mqtt_qos,
+    )
+    service = GitUpdateService(options)
+
+    syncs: dict[str, list[float]] = {"initial": [], "incremental": [], "idle": [], "drift": []}
+    changes: Counter[str] = Counter()
+    failures: list[str] = []
+    maintenance: dict[str, Any] | None = None
+    drift: dict[str, Any] | None = None
+
+    async def run_syncs() -> Counter[str]:
+        churn: Counter[str] = Counter()
+        for _ in range(args.commits):
+            churn.update(repo.mutate())
+            await timed_sync("incremental", "benchmark")
+        for _ in range(args.idle_syncs):
+            await timed_sync("idle", "benchmark")
+        return churn
+
+    def git_phases(since: dict[str, int]) -> dict[str, Any]:
+        phases = recorder.samples["phases"]
+        return {name: summarize(phases.get(name, [])[since.get(name, 0) :]) for name in ("fetch", "diff")}
+
+    async def timed_sync(kind: str, reason: str) -> None:
+        sync_started = time.perf_counter()
+        await service.trigger_sync(reason)
+        syncs[kind].append(time.perf_counter() - sync_started)
+        if not service.status.healthy:
+            failures.append(f"{kind}: {service.status.error}")
+        elif service.status.last_sync is not None:
+            changes[kind] += len(service.status.last_sync.changes)
+
+    async def drift_rounds() -> dict[str, Any]:
+        """Edit freshly deployed files right after each sync; time the repair."""
+
+        target = root / "target"
+        repairs: list[float] = []
+        missed: list[str] = []
+        for _ in range(args.commits):
+            repo.mutate()
+            await timed_sync("drift", "benchmark")
+            last_sync = service.status.last_sync
+            changes = [
+                change
+                for change in (last_sync.changes if last_sync else [])
+                if change.change_type != "deleted"
+            ]
+            # New paths first: they are not watched until the deployment ends.
+            changes.sort(key=lambda change: change.change_type == "modified")
+            paths = [change.path for change in changes[:_DRIFT_EDITS]]
+            edited = time.perf_counter()
+            for path in paths:
+                (target / path).write_text("edited by hand\n", encoding="utf-8")
+            pending = set(paths)
+            while pending and time.perf_counter() - edited < _DRIFT_TIMEOUT:
+                await asyncio.sleep(0.05)
+                for path in list(pending):
+                    if (target / path).read_bytes() == (repo.work / path).read_bytes():
+                        pending.discard(path)
+                        repairs.append(time.perf_counter() - edited)
+            missed.extend(sorted(pending))
+        if missed:
+            failures.append(f"drift: {len(missed)} edit(s) not repaired: {', '.join(missed[:5])}")
+        return {"edits": len(repairs) + len(missed), "missed": len(missed), "repair_seconds": summarize(repairs)}
+
+    try:
+        if args.drift:
+            service.sources["default"].start()
+        await timed_sync("initial", "startup")
+        initial_bytes = metrics.BYTES_COPIED_TOTAL.value()
+        start = {name: len(values) for name, values in recorder.samples["phases"].items()}
+        churn = await run_syncs()
+        if args.maintenance:
+            before = git_phases(start)
+            start = {name: len(values) for name, values in recorder.samples["phases"].items()}
+            stats = await service.sources["default"].maintain(force=True)
+            churn.update(await run_syncs())
+            maintenance = {
+                "run": stats.model_dump(mode="json") if stats else None,
+                "before": before,
+                "after": git_phases(start),
+            }
+        if args.drift:
+            drift = await drift_rounds()
+        # Notifications are delivered from the outbox; give it time to drain.
+        expected = 0 if args.no_mqtt else len(syncs["initial"]) + len(syncs["incremental"]) + len(syncs["drift"])
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline and (
+            broker.messages < expected or service.notifier.outbox.stats.depth
+        ):
+            await asyncio.sleep(0.05)
+    finally:
+        await service.shutdown()
+        await ha.close()
+        await broker.close()
+
+    deployed = {action: value for (action,), value in metrics.FILES_DEPLOYED_TOTAL.snapshot().items()}
+    bytes_copied = metrics.BYTES_COPIED_TOTAL.value()
+    initial_seconds = syncs["initial"][0] if syncs["initial"] else None
+    incremental_seconds = sum(syncs["incremental"])
+    return {
+        "version": RESULT_VERSION,
+        "started_at": started_at.isoformat(),
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "environment": {
+            "python": platform.python_version(),
+            "git": _git_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "repository": {
+            "files": len(repo.files),
+            "bytes": repo.bytes,
+            "commits": repo.commits,
+            "churn": dict(churn),
+            "generate_seconds": generate_seconds,
+        },
+        "syncs": {kind: summarize(values) for kind, values in syncs.items()},
+        "phases": {name: summarize(values) for name, values in sorted(recorder.samples["phases"].items())},
+        "ha_requests": {
+            name: summarize(values) for name, values in sorted(recorder.samples["ha_requests"].items())
+        },
+        "mqtt_publish": summarize(recorder.samples["mqtt_publish"].get("all", [])),
+        "maintenance": maintenance,
+        "drift": drift,
+        "disk": {"repository_bytes": _disk_usage(root / "repo")},
+        "throughput": {
+            "initial_files_per_second": changes["initial"] / initial_seconds if initial_seconds else None,
+            "initial_bytes_per_second": initial_bytes / initial_seconds if initial_seconds else None,
+            "incremental_changes_per_second": (
+                changes["incremental"] / incremental_seconds if incremental_seconds else None
+            ),
+            "bytes_copied": bytes_copied,
+        },
+        "counters": {
+            "files_deployed": deployed,
+            "git_commands": {
+                command: value for (command,), value in sorted(metrics.GIT_COMMANDS_TOTAL.snapshot().items())
+            },
+            "copy_strategies": {
+                strategy: {
+                    "files": files,
+                    "bytes": metrics.COPY_BYTES_TOTAL.value(strategy=strategy),
+                    "seconds": metrics.COPY_SECONDS_TOTAL.value(strategy=strategy),
+                }
+                for (strategy,), files in sorted(metrics.COPY_FILES_TOTAL.snapshot().items())
+            },
+            "ha_requests": dict(ha.requests),
+            "mqtt_messages": broker.messages,
+            "mqtt_bytes": broker.bytes,
+        },
+        # git subprocesses are not included: their ru_maxrss would report the
+        # forked interpreter rather than git itself.
+        "peak_rss_kib": _rss_kib(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        "failures": failures,
+    }
+
+
+def _disk_usage(path: Path) -> int:
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            total += os.lstat(os.path.join(directory, name)).st_size
+    return total
+
+
+def _rss_kib(value: int) -> int:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return value // 1024 if sys.platform == "darwin" else value
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+        root = Path(tempfile.mkdtemp(prefix="git-update-bench-", dir=args.workdir))
+    else:
+        root = Path(tempfile.mkdtemp(prefix="git-update-bench-"))
+    try:
+        result = asyncio.run(run(args, root))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        result["comparison"] = {
+            key: compare(result[key], baseline.get(key))
+            for key in (
+                "syncs",
+                "phases",
+                "ha_requests",
+                "mqtt_publish",
+                "maintenance",
+                "drift",
+                "disk",
+                "throughput",
+                "peak_rss_kib",
+            )
+        }
+    output = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,30 +1,162 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any
+import re
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from .models import StatusResponse
-from .service import GitUpdateService
+from .broadcast import TooManySubscribers
+from .config import DEFAULT_SOURCE
+from .git_client import RollbackError
+from .metrics import CONTENT_TYPE, REGISTRY
+from .models import HistoryEntry, HistoryPage, StatusResponse
+from .service import GitUpdateService, SyncSource
+from .webhook import WebhookError, parse_push, verify_webhook
+
+_COMMIT_RE = re.compile(r"^[0-9a-fA-F]{4,40}$")
+# Comment lines keep idle event streams open through proxies.
+_SSE_KEEPALIVE = 15
 
 
 def create_app(service: GitUpdateService) -> FastAPI:
     app = FastAPI(title="Git Update", version="0.6.3")
 
+    def get_source(name: str | None) -> SyncSource:
+        source = service.sources.get(name or DEFAULT_SOURCE)
+        if source is None:
+            raise HTTPException(status_code=404, detail=f"Unknown source {name!r}")
+        return source
+
     @app.get("/health")
     async def health() -> dict[str, str]:
         return {"status": "ok"}
 
     @app.get("/status", response_model=StatusResponse)
-    async def status() -> StatusResponse:
-        return service.status
+    async def status(
+        source: str | None = None,
+        wait: float = Query(default=0, ge=0, le=300),
+        since: int | None = None,
+    ) -> Response:
+        if source is not None:
+            return Response(
+                get_source(source).status.model_dump_json(), media_type="application/json"
+            )
+        if wait and since is not None:
+            payload = await service.events.wait(since, wait)
+        else:
+            payload = service.events.payload
+        return Response(payload, media_type="application/json")
+
+    @app.get("/events")
+    async def events() -> StreamingResponse:
+        try:
+            queue = service.events.subscribe()
+        except TooManySubscribers as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        async def stream() -> AsyncIterator[bytes]:
+            try:
+                while True:
+                    try:
+                        frame = await asyncio.wait_for(queue.get(), _SSE_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+                        continue
+                    if frame is None:
+                        return
+                    yield frame
+            finally:
+                service.events.unsubscribe(queue)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     @app.post("/sync")
     async def manual_sync(body: dict[str, Any] | None = None) -> StatusResponse:
-        reason = (body or {}).get("reason", "manual")
-        await service.trigger_sync(reason)
-        return service.status
+        reason = str((body or {}).get("reason", "manual"))
+        name = (body or {}).get("source")
+        if name is None:
+            await service.trigger_sync(reason)
+            return service.status
+        source = get_source(name)
+        await service.trigger_sync(reason, sources=[source.name])
+        return source.status
+
+    @app.post("/rollback")
+    async def rollback(body: dict[str, Any] | None = None) -> StatusResponse:
+        commit = (body or {}).get("commit")
+        if commit is not None and not _COMMIT_RE.match(str(commit)):
+            raise HTTPException(status_code=400, detail="commit must be 4-40 hex characters")
+        source = get_source((body or {}).get("source"))
+        try:
+            return await source.rollback(commit)
+        except RollbackError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    @app.post("/webhook", status_code=202)
+    async def webhook(request: Request, source: str | None = None) -> dict[str, Any]:
+        secret = service.options.webhook_secret
+        if not secret:
+            raise HTTPException(status_code=403, detail="webhook_secret is not configured")
+        body = await request.body()
+        try:
+            provider = verify_webhook(secret, request.headers, body)
+        except WebhookError as exc:
+            raise HTTPException(status_code=401, detail=str(exc)) from exc
+        push = parse_push(provider, request.headers, body)
+        if push.event in {"ping", "Ping Hook"}:
+            return {"status": "pong", "provider": provider}
+        if not push.is_push:
+            # Issues, pull requests, stars, ... are signed just like pushes.
+            return {"status": "ignored", "provider": provider, "event": push.event}
+        candidates = [get_source(source)] if source else list(service.sources.values())
+        # Without ?source= every source tracking the pushed branch is synced.
+        names = [
+            candidate.name
+            for candidate in candidates
+            if push.ref == f"refs/heads/{candidate.options.branch}"
+        ]
+        if not names:
+            return {"status": "ignored", "provider": provider, "ref": push.ref}
+        service.request_sync(
+            f"webhook:{provider}", debounce=service.options.webhook_debounce, sources=names
+        )
+        return {"status": "queued", "provider": provider, "sources": names}
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/history", response_model=HistoryPage)
+    async def history(
+        cursor: str | None = None,
+        limit: int = Query(default=50, ge=1, le=500),
+        path: str | None = None,
+        outcome: str | None = None,
+        source: str | None = None,
+    ) -> HistoryPage:
+        journal = get_source(source).history
+        try:
+            entries, next_cursor = await asyncio.to_thread(
+                journal.page, cursor=cursor, limit=limit, path=path, outcome=outcome
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return HistoryPage(entries=entries, next_cursor=next_cursor)
+
+    @app.get("/history/{commit}", response_model=HistoryEntry)
+    async def history_commit(commit: str, source: str | None = None) -> HistoryEntry:
+        if not _COMMIT_RE.match(commit):
+            raise HTTPException(status_code=400, detail="commit must be 4-40 hex characters")
+        entry = await asyncio.to_thread(get_source(source).history.for_commit, commit)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"No sync recorded for {commit}")
+        return entry
 
     @app.get("/config")
     async def config() -> dict[str, Any]:
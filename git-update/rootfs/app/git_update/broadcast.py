@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .models import StatusResponse
+
+_LOGGER = logging.getLogger(__name__)
+# Every message is a full snapshot, so a slow subscriber only needs the
+# latest few; older ones are dropped instead of growing the queue.
+_QUEUE_SIZE = 4
+_MAX_SUBSCRIBERS = 64
+
+
+class TooManySubscribers(RuntimeError):
+    pass
+
+
+class StatusBroadcaster:
+    """Versioned status snapshots shared by `/events` and `/status`.
+
+    Each distinct status is serialized once when it is published and the
+    same bytes go to every subscriber and long-poll waiter. The version
+    increases by one per published change; publishing an unchanged status
+    is a no-op.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._status: StatusResponse | None = None
+        self.payload = b"null"
+        self._frame = b""
+        self._changed = asyncio.Event()
+        self._subscribers: set[asyncio.Queue[bytes | None]] = set()
+
+    def publish(self, status: StatusResponse) -> bool:
+        if status == self._status:
+            return False
+        self._status = status
+        self.version += 1
+        versioned = status.model_copy(update={"version": self.version})
+        self.payload = versioned.model_dump_json().encode()
+        self._frame = b"id: %d\nevent: status\ndata: %s\n\n" % (self.version, self.payload)
+        for queue in self._subscribers:
+            _offer(queue, self._frame)
+        # Wake current long-polls; later ones wait on a fresh event.
+        self._changed.set()
+        self._changed = asyncio.Event()
+        return True
+
+    async def wait(self, since: int, timeout: float) -> bytes:
+        """Status once its version differs from `since`, or after `timeout`."""
+
+        if since == self.version:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.payload
+
+    def subscribe(self) -> asyncio.Queue[bytes | None]:
+        """Queue of SSE frames, starting with the current status.
+
+        `None` marks the end of the stream. Call `unsubscribe` when done.
+        """
+
+        if len(self._subscribers) >= _MAX_SUBSCRIBERS:
+            raise TooManySubscribers(f"At most {_MAX_SUBSCRIBERS} event subscribers")
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        if self._frame:
+            queue.put_nowait(self._frame)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[bytes | None]) -> None:
+        self._subscribers.discard(queue)
+
+    def close(self) -> None:
+        for queue in self._subscribers:
+            _offer(queue, None)
+        self._subscribers.clear()
+
+
+def _offer(queue: asyncio.Queue[bytes | None], item: bytes | None) -> None:
+    if queue.full():
+        queue.get_nowait()
+        _LOGGER.debug("Event subscriber is lagging, dropped an older status")
+    queue.put_nowait(item)
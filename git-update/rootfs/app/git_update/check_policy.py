@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+from .config import Options, STATE_DIR
+from .metrics import CONFIG_CHECKS_TOTAL
+from .models import ConfigCheckStats, FileChange
+from .path_filter import PathFilter
+
+_LOGGER = logging.getLogger(__name__)
+CACHE_VERSION = 1
+# Recently validated trees; enough to cover reverts and flip-flopping pushes.
+_MAX_TREES = 32
+
+
+@dataclass
+class CheckDecision:
+    action: str  # "checked", "skipped" or "cached"
+    reason: str | None = None
+
+    @property
+    def run(self) -> bool:
+        return self.action == "checked"
+
+
+class ConfigCheckPolicy:
+    """Decide whether a deployment needs Home Assistant's `check_config`.
+
+    The check is skipped when none of the changed paths matches
+    `check_config_paths`, or when the deployed git tree already passed the
+    check before (e.g. after a revert). Only successful checks are cached.
+    """
+
+    def __init__(self, options: Options, state_dir: Path = STATE_DIR) -> None:
+        self._filter = PathFilter(options.check_config_paths)
+        self._cache_enabled = options.check_config_cache
+        self._cache_path = state_dir / "config_check_cache.json"
+        self._valid_trees: OrderedDict[str, str] = (
+            self._load() if self._cache_enabled else OrderedDict()
+        )
+        self.stats = ConfigCheckStats()
+
+    def decide(self, changes: Sequence[FileChange], tree: str | None) -> CheckDecision:
+        if self._filter.active and not any(self._relevant(change) for change in changes):
+            decision = CheckDecision("skipped", "no config-relevant changes")
+        elif self._cache_enabled and tree is not None and tree in self._valid_trees:
+            decision = CheckDecision("cached", f"tree validated at {self._valid_trees[tree]}")
+        else:
+            decision = CheckDecision("checked")
+        setattr(self.stats, decision.action, getattr(self.stats, decision.action) + 1)
+        self.stats.last_decision = decision.action
+        self.stats.last_reason = decision.reason
+        self.stats.last_tree = tree
+        CONFIG_CHECKS_TOTAL.inc(decision=decision.action)
+        return decision
+
+    def record(self, tree: str | None, is_valid: bool | None) -> None:
+        """Remember the outcome of a check that ran for `tree`."""
+
+        if not self._cache_enabled or tree is None or is_valid is None:
+            return
+        if is_valid:
+            self._valid_trees[tree] = datetime.now(timezone.utc).isoformat()
+            self._valid_trees.move_to_end(tree)
+            while len(self._valid_trees) > _MAX_TREES:
+                self._valid_trees.popitem(last=False)
+        elif self._valid_trees.pop(tree, None) is None:
+            return
+        self._save()
+
+    def _relevant(self, change: FileChange) -> bool:
+        if self._filter.matches(change.path):
+            return True
+        return change.previous_path is not None and self._filter.matches(change.previous_path)
+
+    def _load(self) -> OrderedDict[str, str]:
+        try:
+            with self._cache_path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return OrderedDict()
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Ignoring unreadable config check cache %s: %s", self._cache_path, exc)
+            return OrderedDict()
+        if data.get("version") != CACHE_VERSION:
+            return OrderedDict()
+        return OrderedDict((tree, checked_at) for tree, checked_at in data.get("trees", []))
+
+    def _save(self) -> None:
+        data = {"version": CACHE_VERSION, "trees": list(self._valid_trees.items())}
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=".config-check-", dir=self._cache_path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(tmp_name, self._cache_path)
+        except OSError as exc:
+            _LOGGER.warning("Failed to persist config check cache: %s", exc)
@@ -5,13 +5,18 @@ import os
 from pathlib import Path
 from typing import Any
 
-from pydantic import BaseModel, Field, PositiveInt, ValidationError
+from pydantic import BaseModel, Field, PositiveInt, ValidationError, model_validator
+
+from .path_filter import PathFilter
 
 OPTIONS_PATH = Path(os.getenv("ADDON_OPTIONS_FILE", "/data/options.json"))
 LOCAL_DEV_OPTIONS = Path("./dev/options.json")
 STATE_DIR = Path(os.getenv("GIT_UPDATE_STATE_DIR", "/data/state"))
 REPO_DIR = Path(os.getenv("GIT_UPDATE_REPO_DIR", "/data/repo"))
+HA_CONFIG_DIR = Path(os.getenv("GIT_UPDATE_HA_CONFIG_DIR", "/config"))
 DEFAULT_HTTP_PORT = 7999
+# Name of the source configured by the top-level repository options.
+DEFAULT_SOURCE = "default"
 
 
 class MqttSettings(BaseModel):
@@ -23,6 +28,19 @@ class MqttSettings(BaseModel):
     topic: str = "homeassistant/git_update"
     qos: int = Field(default=1, ge=0, le=2)
     retain: bool = False
+    queue_size: int = Field(default=100, ge=1)
+
+
+class SourceOptions(BaseModel):
+    """An additional repository synced next to the top-level one."""
+
+    name: str = Field(pattern=r"^[a-z0-9][a-z0-9_-]*$")
+    repo_url: str
+    branch: str = "main"
+    access_token: str | None = None
+    target_path: str = "/config"
+    include_paths: list[str] = Field(default_factory=list)
+    exclude_paths: list[str] = Field(default_factory=list)
 
 
 class Options(BaseModel):
@@ -32,14 +50,39 @@ class Options(BaseModel):
     ha_access_token: str | None = None
     ha_base_url: str | None = None
     ha_verify_ssl: bool = True
+    ha_transport: str = Field(default="rest", pattern=r"^(rest|websocket)$")
     target_path: str = "/config"
+    deploy_workers: int = Field(default=4, ge=1, le=32)
+    deploy_atomic: bool = True
+    deploy_hardlink_paths: list[str] = Field(default_factory=list)
+    drift_policy: str = Field(default="report", pattern=r"^(off|report|redeploy)$")
+    yaml_cache_size: int = Field(default=20000, ge=0)
+    history_size: int = Field(default=1000, ge=0)
+    check_config_paths: list[str] = Field(
+        default_factory=lambda: ["**/*.yaml", "**/*.yml", "custom_components"]
+    )
+    check_config_cache: bool = True
+    auto_reload: bool = True
     poll_interval: PositiveInt = 300
+    poll_interval_min: PositiveInt = 60
+    poll_interval_max: PositiveInt = 3600
+    poll_jitter: float = Field(default=0.1, ge=0, le=0.5)
     git_depth: int = Field(default=1, ge=0)
+    git_maintenance_interval: int = Field(default=86400, ge=0)
+    remote_probe: bool = True
+    partial_clone: bool = False
+    bare_repo: bool = False
+    include_paths: list[str] = Field(default_factory=list)
+    exclude_paths: list[str] = Field(default_factory=list)
     ha_event_name: str = "git_update.files_changed"
     notify_on_startup: bool = True
+    payload_mode: str = Field(default="full", pattern=r"^(full|summary|chunked)$")
+    payload_chunk_bytes: int = Field(default=65536, ge=4096)
     verify_ssl: bool = True
     log_level: str = Field(default="info", pattern=r"^(debug|info|warning|error)$")
     http_api_port: int = DEFAULT_HTTP_PORT
+    webhook_secret: str | None = None
+    webhook_debounce: int = Field(default=5, ge=0)
     mqtt_enabled: bool = False
     mqtt_topic: str = "homeassistant/git_update"
     mqtt_host: str | None = None
@@ -48,6 +91,53 @@ class Options(BaseModel):
     mqtt_password: str | None = None
     mqtt_qos: int | None = None
     mqtt_retain: bool = False
+    mqtt_queue_size: int = Field(default=100, ge=1)
+    outbox_size: int = Field(default=10000, ge=0)
+    sources: list[SourceOptions] = Field(default_factory=list)
+    max_concurrent_syncs: int = Field(default=2, ge=1, le=16)
+
+    @model_validator(mode="after")
+    def _check_poll_bounds(self) -> Options:
+        if self.poll_interval_min > self.poll_interval_max:
+            raise ValueError("poll_interval_min must not exceed poll_interval_max")
+        return self
+
+    @model_validator(mode="after")
+    def _check_sources(self) -> Options:
+        names = [DEFAULT_SOURCE] + [source.name for source in self.sources]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate source names: {', '.join(duplicates)}")
+        configured = list(self.source_options().items())
+        for index, (name, options) in enumerate(configured):
+            for other_name, other in configured[index + 1 :]:
+                shared = _shared_directory(options, other)
+                if shared is not None:
+                    raise ValueError(
+                        f"Sources {name!r} and {other_name!r} both deploy to {shared}; "
+                        "use distinct target_path, include_paths or exclude_paths"
+                    )
+        return self
+
+    def source_options(self) -> dict[str, Options]:
+        """Effective options of every source, keyed by name.
+
+        The top-level repository options form the `default` source; each
+        entry of `sources` overrides them for one more repository.
+        """
+
+        result = {DEFAULT_SOURCE: self.model_copy(update={"sources": []})}
+        for source in self.sources:
+            result[source.name] = self.model_copy(
+                update={**source.model_dump(exclude={"name"}), "sources": []}
+            )
+        return result
+
+    def deploy_roots(self) -> list[Path]:
+        """Target paths below which this configuration may write."""
+
+        base = Path(self.target_path).resolve()
+        return [base / root for root in self.path_filter().roots()]
 
     def mqtt(self) -> MqttSettings:
         return MqttSettings(
@@ -59,8 +149,28 @@ class Options(BaseModel):
             topic=self.mqtt_topic,
             qos=self.mqtt_qos if self.mqtt_qos is not None else 1,
             retain=self.mqtt_retain,
+            queue_size=self.mqtt_queue_size,
         )
 
+    def path_filter(self) -> PathFilter:
+        return PathFilter(self.include_paths, self.exclude_paths)
+
+
+def _shared_directory(first: Options, second: Options) -> Path | None:
+    """A directory both configurations may write to, or None."""
+
+    for outer, inner in ((first, second), (second, first)):
+        outer_base = Path(outer.target_path).resolve()
+        outer_filter = outer.path_filter()
+        for outer_root in outer.deploy_roots():
+            for inner_root in inner.deploy_roots():
+                if outer_root != inner_root and outer_root not in inner_root.parents:
+                    continue
+                relative = "/".join(inner_root.relative_to(outer_base).parts)
+                if not outer_filter.excludes_tree(relative):
+                    return inner_root
+    return None
+
 
 def _load_raw_options() -> dict[str, Any]:
     candidates = [OPTIONS_PATH, LOCAL_DEV_OPTIONS]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import errno
+import fcntl
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+# ioctl(2) request that clones a whole file on btrfs, XFS and other CoW filesystems.
+_FICLONE = 0x40049409
+_CHUNK_SIZE = 1024 * 1024
+_PROBE_SIZE = 64 * 1024
+# errno values meaning "not supported here"; anything else is an I/O error.
+_UNSUPPORTED = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY, errno.EINVAL}
+)
+# Cheapest first; the chunked copy works everywhere. The others rely on
+# Linux semantics (sendfile to regular files, FICLONE).
+STRATEGIES = ("reflink", "copy_file_range", "sendfile", "chunked")
+_AVAILABLE = STRATEGIES if sys.platform.startswith("linux") else ("chunked",)
+
+
+class CopyEngine:
+    """Copy repository files into the target tree as cheaply as possible.
+
+    The first copy probes what the repository and target filesystems
+    support, in order: a reflink clone (copy-on-write, no data written),
+    `copy_file_range` (copied in the kernel, offloaded by some
+    filesystems), `sendfile` and a chunked read/write loop. Every copy then
+    starts with the cheapest supported strategy and falls back to the next
+    one for that file if it is refused.
+
+    With `link=True` a file is hard linked instead when both trees share a
+    filesystem. The target then shares its inode with the checkout, which
+    is safe because git replaces files rather than rewriting them, but the
+    target must not be edited in place.
+    """
+
+    def __init__(self, source_root: Path, target_root: Path) -> None:
+        self._source_root = source_root
+        self._target_root = target_root
+        self._lock = threading.Lock()
+        self._strategies: tuple[str, ...] | None = None
+        self._can_link = False
+
+    @property
+    def strategy(self) -> str | None:
+        """Preferred strategy once probed."""
+
+        return self._strategies[0] if self._strategies else None
+
+    def copy(self, source: Path, target: Path, *, link: bool = False) -> tuple[str, int]:
+        """Copy `source` with its metadata, like `shutil.copy2`.
+
+        Returns the strategy that was used (or "hardlink") and the size.
+        """
+
+        strategies = self._detect()
+        if link and self._can_link and self._link(source, target):
+            return "hardlink", target.stat().st_size
+        strategy, size = self._copy_data(source, target, strategies)
+        shutil.copystat(source, target)
+        return strategy, size
+
+    def _detect(self) -> tuple[str, ...]:
+        with self._lock:
+            if self._strategies is None:
+                self._strategies, self._can_link = self._probe()
+                _LOGGER.info(
+                    "Copying files with %s (hard links %s)",
+                    self._strategies[0],
+                    "available" if self._can_link else "unavailable",
+                )
+            return self._strategies
+
+    def _probe(self) -> tuple[tuple[str, ...], bool]:
+        """Find the strategies that work between the two filesystems."""
+
+        # The checkout itself must not gain files, but .git shares its filesystem.
+        source_dir = self._source_root / ".git"
+        if not source_dir.is_dir():
+            source_dir = self._source_root
+        data = os.urandom(_PROBE_SIZE)
+        try:
+            src_fd, src_name = tempfile.mkstemp(prefix=".git_update_probe-", dir=source_dir)
+        except OSError as exc:
+            _LOGGER.debug("Cannot probe copy strategies: %s", exc)
+            return _AVAILABLE, False
+        supported: list[str] = []
+        can_link = False
+        try:
+            _write_all(src_fd, data)
+            dst_fd, dst_name = tempfile.mkstemp(prefix=".git_update_probe-", dir=self._target_root)
+            try:
+                for strategy in _AVAILABLE[:-1]:
+                    _rewind(dst_fd)
+                    try:
+                        _COPIERS[strategy](src_fd, dst_fd, len(data))
+                    except OSError as exc:
+                        _LOGGER.debug("Copy strategy %s unavailable: %s", strategy, exc)
+                        continue
+                    if os.pread(dst_fd, len(data) + 1, 0) == data:
+                        supported.append(strategy)
+                link_name = f"{dst_name}.link"
+                try:
+                    os.link(src_name, link_name)
+                    can_link = True
+                    os.unlink(link_name)
+                except OSError as exc:
+                    _LOGGER.debug("Hard links unavailable: %s", exc)
+            finally:
+                os.close(dst_fd)
+                os.unlink(dst_name)
+        except OSError as exc:
+            _LOGGER.debug("Cannot probe copy strategies: %s", exc)
+            return _AVAILABLE, False
+        finally:
+            os.close(src_fd)
+            os.unlink(src_name)
+        return (*supported, "chunked"), can_link
+
+    @staticmethod
+    def _copy_data(source: Path, target: Path, strategies: tuple[str, ...]) -> tuple[str, int]:
+        # Raw descriptors: none of the strategies needs Python's buffering.
+        src = os.open(source, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            dst = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o666)
+            try:
+                size = os.fstat(src).st_size
+                for strategy in strategies:
+                    try:
+                        _COPIERS[strategy](src, dst, size)
+                        return strategy, size
+                    except OSError as exc:
+                        if strategy == "chunked" or exc.errno not in _UNSUPPORTED:
+                            raise
+                        _rewind(dst)
+            finally:
+                os.close(dst)
+        finally:
+            os.close(src)
+        raise AssertionError("chunked copy never declines")
+
+    @staticmethod
+    def _link(source: Path, target: Path) -> bool:
+        # Linked under a temporary name first: os.link cannot replace a file.
+        temporary = target.parent / f".git_update_link-{uuid.uuid4().hex}"
+        try:
+            os.link(source, temporary)
+        except OSError as exc:
+            _LOGGER.debug("Cannot hard link %s, copying: %s", source, exc)
+            return False
+        try:
+            os.replace(temporary, target)
+        except OSError:
+            temporary.unlink(missing_ok=True)
+            raise
+        return True
+
+
+def _reflink(src: int, dst: int, size: int) -> None:
+    fcntl.ioctl(dst, _FICLONE, src)
+
+
+def _copy_file_range(src: int, dst: int, size: int) -> None:
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(src, dst, size - offset, offset, offset)
+        if not copied:
+            break
+        offset += copied
+
+
+def _sendfile(src: int, dst: int, size: int) -> None:
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst, src, offset, size - offset)
+        if not sent:
+            break
+        offset += sent
+
+
+def _chunked(src: int, dst: int, size: int) -> None:
+    offset = 0
+    while chunk := os.pread(src, _CHUNK_SIZE, offset):
+        _write_all(dst, chunk)
+        offset += len(chunk)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _rewind(fd: int) -> None:
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+
+
+_COPIERS: dict[str, Callable[[int, int, int], None]] = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "chunked": _chunked,
+}
@@ -1,80 +1,513 @@
 from __future__ import annotations
 
 import logging
-import shutil
-from pathlib import Path
-from typing import Iterable
+import os
+import stat
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterable, Iterator, Sequence, TypeVar
 
-import yaml
-
-from .config import Options, REPO_DIR
+from .config import Options, REPO_DIR, STATE_DIR
+from .copy_engine import CopyEngine
+from .manifest import DeploymentManifest
+from .metrics import (
+    BYTES_COPIED_TOTAL,
+    COPY_BYTES_TOTAL,
+    COPY_FILES_TOTAL,
+    COPY_SECONDS_TOTAL,
+    FILES_DEPLOYED_TOTAL,
+    observe_phase,
+)
 from .models import FileChange
+from .object_reader import GitObjectReader, ObjectInfo, ObjectReadError
+from .path_filter import PathFilter
+from .transaction import DeployTransaction
+from .yaml_validation import YamlValidator
 
 _LOGGER = logging.getLogger(__name__)
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+_EXECUTABLE_MODE = "100755"
+_SYMLINK_MODE = "120000"
+# Strategy recorded for files written from the object database.
+_OBJECT_STRATEGY = "git_object"
 
 
 class DeploymentError(RuntimeError):
     """Raised when deploying a change fails."""
 
 
+@dataclass
+class DeployReport:
+    copied: int = 0
+    skipped: int = 0
+    removed: int = 0
+    bytes_copied: int = 0
+    # Copied files per copy strategy (see `CopyEngine`, and "git_object").
+    strategies: dict[str, int] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class _PendingCopy:
+    change: FileChange
+    # None when deploying from git objects (`bare_repo`).
+    repo_path: Path | None
+    target_path: Path
+    size: int = 0
+    # The target is removed earlier in the same deploy, so it must be written.
+    after_removal: bool = False
+    stage_path: Path | None = None
+    # The blob to write, when deploying from git objects.
+    object: ObjectInfo | None = None
+
+
 class FileDeployer:
-    def __init__(self, options: Options) -> None:
-        self._repo_dir = REPO_DIR.resolve()
+    """Apply git changes to the target directory.
+
+    Deployment runs in phases: plan (resolve and guard paths), validate
+    (manifest check and YAML parsing, in parallel), remove (deletes and
+    rename sources, before any write), mkdir (each parent once) and copy
+    (in parallel). The first error aborts the remaining work.
+
+    In atomic mode the copy phase writes into a staging area instead, and a
+    final commit phase moves everything into place with renames. Any error
+    restores the previous tree; otherwise the deployment stays pending until
+    `commit` or `rollback` is called (e.g. after Home Assistant validated
+    the new configuration).
+
+    With `bare_repo` there is no checkout to copy from: sizes, YAML sources
+    and file contents are read from the object database through one
+    `git cat-file` process per deployment, and the copy phase streams the
+    blobs into place in order.
+    """
+
+    def __init__(
+        self,
+        options: Options,
+        repo_dir: Path = REPO_DIR,
+        state_dir: Path = STATE_DIR,
+    ) -> None:
+        self._repo_dir = repo_dir.resolve()
         self._target_base = Path(options.target_path).resolve()
         self._target_base.mkdir(parents=True, exist_ok=True)
+        self._workers = options.deploy_workers
+        self._atomic = options.deploy_atomic
+        self._bare = options.bare_repo
+        self._objects: GitObjectReader | None = None
+        self._copier = CopyEngine(self._repo_dir, self._target_base)
+        self._hardlinks = PathFilter(options.deploy_hardlink_paths)
+        self._manifest_path = state_dir / "deploy_manifest.json"
+        self._manifest = DeploymentManifest(self._manifest_path, self._target_base)
+        self._transaction: DeployTransaction | None = None
+        self._yaml = YamlValidator(state_dir / "yaml_cache.json", options.yaml_cache_size)
+        DeployTransaction.recover(self._target_base)
 
-    def deploy(self, changes: Iterable[FileChange]) -> None:
-        for change in changes:
-            self._apply_change(change)
-
-    def _apply_change(self, change: FileChange) -> None:
-        repo_path = (self._repo_dir / change.path).resolve()
-        target_path = (self._target_base / change.path).resolve()
-
-        self._guard_repo_path(repo_path)
-        self._guard_path(target_path)
-
-        if change.change_type in {"added", "modified"}:
-            self._copy_file(repo_path, target_path)
-        elif change.change_type == "renamed":
-            if change.previous_path:
-                old_target = (self._target_base / change.previous_path).resolve()
-                if old_target.exists():
-                    _LOGGER.debug("Removing renamed target %s", old_target)
-                    try:
-                        old_target.unlink()
-                    except OSError as exc:
-                        raise DeploymentError(f"Failed to remove {old_target}: {exc}") from exc
-            self._copy_file(repo_path, target_path)
-        elif change.change_type == "deleted":
-            if target_path.exists():
-                _LOGGER.info("Removing deleted file %s", target_path)
+    @property
+    def target_base(self) -> Path:
+        return self._target_base
+
+    @property
+    def manifest(self) -> DeploymentManifest:
+        """Deployed blobs of the committed tree (replaced after a rollback)."""
+
+        return self._manifest
+
+    def deploy(self, changes: Iterable[FileChange]) -> DeployReport:
+        if self._transaction is not None:
+            self.commit()
+        if not self._bare:
+            return self._deploy(changes)
+        # One process for the whole deployment; closing it afterwards keeps
+        # it from holding on to packs that maintenance replaces.
+        with GitObjectReader(self._repo_dir / ".git") as objects:
+            self._objects = objects
+            try:
+                return self._deploy(changes)
+            finally:
+                self._objects = None
+
+    def _deploy(self, changes: Iterable[FileChange]) -> DeployReport:
+        report = DeployReport()
+
+        with self._phase(report, "plan"):
+            removals, copies = self._plan(changes)
+        with self._phase(report, "validate"):
+            if self._objects is not None:
+                self._lookup_objects(copies)
+            try:
+                checked = self._run_parallel(self._check_copy, copies)
+            finally:
+                self._yaml.save()
+            copies = [item for item in checked if item is not None]
+            report.skipped = len(checked) - len(copies)
+
+        if self._atomic:
+            self._deploy_staged(removals, copies, report)
+        else:
+            with self._phase(report, "remove"):
+                for path, target_path in removals:
+                    if self._remove_file(path, target_path):
+                        report.removed += 1
+            with self._phase(report, "mkdir"):
+                for directory in sorted({item.target_path.parent for item in copies}):
+                    directory.mkdir(parents=True, exist_ok=True)
+            with self._phase(report, "copy"):
+                self._copy_all(copies, report)
+        self._record_copies(copies)
+        report.copied = len(copies)
+        report.bytes_copied = sum(item.size for item in copies)
+        FILES_DEPLOYED_TOTAL.inc(report.copied, action="copied")
+        FILES_DEPLOYED_TOTAL.inc(report.skipped, action="skipped")
+        FILES_DEPLOYED_TOTAL.inc(report.removed, action="removed")
+        BYTES_COPIED_TOTAL.inc(report.bytes_copied)
+
+        if not self._atomic:
+            self._save_manifest()
+        _LOGGER.info(
+            "Deployment finished: %d copied, %d unchanged, %d removed",
+            report.copied,
+            report.skipped,
+            report.removed,
+        )
+        _LOGGER.debug(
+            "Deployment phases: %s",
+            ", ".join(f"{name}={seconds:.3f}s" for name, seconds in report.timings.items()),
+        )
+        if report.strategies:
+            _LOGGER.debug(
+                "Copy strategies: %s",
+                ", ".join(f"{name}={count}" for name, count in sorted(report.strategies.items())),
+            )
+        return report
+
+    def commit(self) -> None:
+        """Keep the pending atomic deployment and drop its backups."""
+
+        if self._transaction is None:
+            return
+        self._transaction.discard()
+        self._transaction = None
+        self._save_manifest()
+
+    def rollback(self) -> bool:
+        """Restore the tree from before the pending atomic deployment.
+
+        Returns False when there is nothing to roll back (non-atomic mode or
+        the deployment was already committed).
+        """
+
+        if self._transaction is None:
+            return False
+        _LOGGER.warning("Rolling back deployment in %s", self._target_base)
+        self._transaction.rollback()
+        self._transaction = None
+        # Forget entries recorded for the rolled back files.
+        self._manifest = DeploymentManifest(self._manifest_path, self._target_base)
+        return True
+
+    def _deploy_staged(
+        self,
+        removals: list[tuple[str, Path]],
+        copies: list[_PendingCopy],
+        report: DeployReport,
+    ) -> None:
+        try:
+            transaction = DeployTransaction(self._target_base)
+        except OSError as exc:
+            raise DeploymentError(f"Failed to create staging area: {exc}") from exc
+        try:
+            for _, target_path in removals:
+                transaction.add_removal(target_path)
+            for directory in sorted({item.target_path.parent for item in copies}):
+                transaction.add_directory(directory)
+            for item in copies:
+                item.stage_path = transaction.add_write(item.target_path)
+            with self._phase(report, "stage"):
+                self._copy_all(copies, report)
+            with self._phase(report, "commit"):
                 try:
-                    target_path.unlink()
+                    transaction.commit()
                 except OSError as exc:
-                    raise DeploymentError(f"Failed to remove {target_path}: {exc}") from exc
+                    raise DeploymentError(f"Failed to commit deployment: {exc}") from exc
+        except BaseException:
+            transaction.rollback()
+            raise
+        for path, _ in removals:
+            self._manifest.discard(path)
+        report.removed = transaction.removed
+        self._transaction = transaction
+
+    def _save_manifest(self) -> None:
+        # Persist only after every change applied; a stale entry is harmless
+        # because its recorded size/mtime no longer match the target.
+        try:
+            self._manifest.save()
+        except OSError as exc:
+            _LOGGER.warning("Failed to persist deployment manifest: %s", exc)
+
+    def _plan(
+        self, changes: Iterable[FileChange]
+    ) -> tuple[list[tuple[str, Path]], list[_PendingCopy]]:
+        removals: list[tuple[str, Path]] = []
+        copies: list[_PendingCopy] = []
+        for change in changes:
+            repo_path = None
+            if not self._bare:
+                repo_path = (self._repo_dir / change.path).resolve()
+                self._guard_repo_path(repo_path)
+            target_path = (self._target_base / change.path).resolve()
+            self._guard_path(target_path)
+
+            if change.change_type in {"added", "modified"}:
+                copies.append(_PendingCopy(change, repo_path, target_path))
+            elif change.change_type == "renamed":
+                if change.previous_path:
+                    old_target = (self._target_base / change.previous_path).resolve()
+                    self._guard_path(old_target)
+                    removals.append((change.previous_path, old_target))
+                copies.append(_PendingCopy(change, repo_path, target_path))
+            elif change.change_type == "deleted":
+                removals.append((change.path, target_path))
+            else:
+                _LOGGER.warning("Unknown change type %s for %s", change.change_type, change.path)
+        removed_targets = {target_path for _, target_path in removals}
+        for item in copies:
+            item.after_removal = item.target_path in removed_targets
+        return removals, copies
+
+    def _lookup_objects(self, copies: Sequence[_PendingCopy]) -> None:
+        """Resolve the blob of every copy with one pipelined lookup."""
+
+        assert self._objects is not None
+        names = [
+            # Symlinks are resolved by path so git follows them.
+            f"HEAD:{item.change.path}"
+            if item.change.mode == _SYMLINK_MODE or not item.change.blob_sha
+            else item.change.blob_sha
+            for item in copies
+        ]
+        try:
+            infos = self._objects.info_many(names)
+        except (ObjectReadError, ValueError) as exc:
+            raise DeploymentError(f"Failed to read repository objects: {exc}") from exc
+        for item, info in zip(copies, infos):
+            item.object = info
+
+    def _check_copy(self, item: _PendingCopy) -> _PendingCopy | None:
+        """Return the copy if it still has to happen, validating YAML sources."""
+
+        if item.repo_path is None:
+            return self._check_object(item)
+        if not item.repo_path.exists():
+            _LOGGER.warning("Repository file %s missing, skipping", item.repo_path)
+            return None
+        item.size = item.repo_path.stat().st_size
+        blob_sha = item.change.blob_sha
+        if blob_sha and not item.after_removal and self._manifest.is_current(
+            item.change.path, blob_sha, item.target_path, item.size
+        ):
+            _LOGGER.debug("Target %s already up to date, skipping", item.target_path)
+            return None
+        if item.repo_path.suffix in {".yaml", ".yml"}:
+            self._validate_yaml(item.repo_path, blob_sha)
+        return item
+
+    def _check_object(self, item: _PendingCopy) -> _PendingCopy | None:
+        """`_check_copy` for a blob that is read from the object database."""
+
+        path = item.change.path
+        info = item.object
+        if info is None:
+            _LOGGER.warning("Repository file %s missing, skipping", path)
+            return None
+        if info.type == "symlink":
+            raise DeploymentError(f"Unsafe repository path {path}")
+        if info.type != "blob":
+            raise DeploymentError(f"Repository path {path} is not a file")
+        if info.oid != item.change.blob_sha:
+            # A followed symlink: the manifest tracks the content deployed.
+            item.change = item.change.model_copy(update={"blob_sha": info.oid})
+        item.size = info.size
+        if not item.after_removal and self._manifest.is_current(
+            path, info.oid, item.target_path, item.size
+        ):
+            _LOGGER.debug("Target %s already up to date, skipping", item.target_path)
+            return None
+        if PurePosixPath(path).suffix in {".yaml", ".yml"}:
+            self._validate_yaml(
+                Path(path), info.oid, content=partial(self._read_object, info.oid)
+            )
+        return item
+
+    def _remove_file(self, path: str, target_path: Path) -> bool:
+        self._manifest.discard(path)
+        if not target_path.exists():
+            return False
+        _LOGGER.info("Removing %s", target_path)
+        try:
+            target_path.unlink()
+        except OSError as exc:
+            raise DeploymentError(f"Failed to remove {target_path}: {exc}") from exc
+        return True
+
+    def _copy_all(self, copies: Sequence[_PendingCopy], report: DeployReport) -> None:
+        """Copy (or stage) `copies` and account for the copy strategies used."""
+
+        files: Counter[str] = Counter()
+        sizes: Counter[str] = Counter()
+        seconds: defaultdict[str, float] = defaultdict(float)
+        if self._objects is not None:
+            results = self._write_objects(copies)
         else:
-            _LOGGER.warning("Unknown change type %s for %s", change.change_type, change.path)
+            results = self._run_parallel(self._copy_file, copies)
+        for strategy, size, duration in results:
+            files[strategy] += 1
+            sizes[strategy] += size
+            seconds[strategy] += duration
+        for strategy, count in files.items():
+            COPY_FILES_TOTAL.inc(count, strategy=strategy)
+            COPY_BYTES_TOTAL.inc(sizes[strategy], strategy=strategy)
+            COPY_SECONDS_TOTAL.inc(seconds[strategy], strategy=strategy)
+        report.strategies = dict(files)
 
-    def _copy_file(self, repo_path: Path, target_path: Path) -> None:
-        if not repo_path.exists():
-            _LOGGER.warning("Repository file %s missing, skipping", repo_path)
-            return
-        if repo_path.suffix in {".yaml", ".yml"}:
-            self._validate_yaml(repo_path)
-        target_path.parent.mkdir(parents=True, exist_ok=True)
-        _LOGGER.info("Deploying %s -> %s", repo_path, target_path)
+    def _copy_file(self, item: _PendingCopy) -> tuple[str, int, float]:
+        assert item.repo_path is not None
+        _LOGGER.info("Deploying %s -> %s", item.repo_path, item.target_path)
+        link = self._hardlinks.active and self._hardlinks.matches(item.change.path)
+        started = time.perf_counter()
         try:
-            shutil.copy2(repo_path, target_path)
+            strategy, size = self._copier.copy(
+                item.repo_path, item.stage_path or item.target_path, link=link
+            )
         except OSError as exc:
-            raise DeploymentError(f"Failed to copy {repo_path} to {target_path}: {exc}") from exc
+            raise DeploymentError(
+                f"Failed to copy {item.repo_path} to {item.target_path}: {exc}"
+            ) from exc
+        return strategy, size, time.perf_counter() - started
 
-    def _validate_yaml(self, path: Path) -> None:
+    def _write_objects(self, copies: Sequence[_PendingCopy]) -> list[tuple[str, int, float]]:
+        """Stream the blobs of `copies` into their targets, in order.
+
+        git sends the blobs back to back, so the files are written on this
+        thread rather than the worker pool.
+        """
+
+        assert self._objects is not None
+        results: list[tuple[str, int, float]] = []
+        stream = self._objects.contents_many(
+            [item.object.oid for item in copies if item.object is not None]
+        )
         try:
-            with path.open("r", encoding="utf-8") as handle:
-                yaml.safe_load(handle)
-        except yaml.YAMLError as exc:
-            raise DeploymentError(f"Invalid YAML in {path}: {exc}") from exc
+            for item, (info, chunks) in zip(copies, stream, strict=True):
+                if info is None:
+                    raise DeploymentError(f"Repository file {item.change.path} disappeared")
+                started = time.perf_counter()
+                fd = self._open_target(item)
+                try:
+                    for chunk in chunks:
+                        _write_all(fd, chunk)
+                except OSError as exc:
+                    raise DeploymentError(
+                        f"Failed to write {item.change.path} to {item.target_path}: {exc}"
+                    ) from exc
+                finally:
+                    os.close(fd)
+                results.append((_OBJECT_STRATEGY, info.size, time.perf_counter() - started))
+        except ObjectReadError as exc:
+            raise DeploymentError(f"Failed to read repository objects: {exc}") from exc
+        finally:
+            stream.close()
+        return results
+
+    def _open_target(self, item: _PendingCopy) -> int:
+        """Open (create) the file `item` is written to, with git's permissions."""
+
+        _LOGGER.info("Deploying %s -> %s", item.change.path, item.target_path)
+        target = item.stage_path or item.target_path
+        executable = item.change.mode == _EXECUTABLE_MODE
+        try:
+            # New files get git's permissions, as a checkout would: the
+            # kernel applies the umask to the mode given here.
+            fd = os.open(
+                target,
+                os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC,
+                0o777 if executable else 0o666,
+            )
+        except OSError as exc:
+            raise DeploymentError(f"Failed to create {item.target_path}: {exc}") from exc
+        try:
+            # An existing file keeps its mode; only the executable bits follow
+            # git, set wherever the file is readable.
+            current = stat.S_IMODE(os.fstat(fd).st_mode)
+            mode = current & ~0o111
+            if executable:
+                mode |= (current & 0o444) >> 2
+            if mode != current:
+                os.fchmod(fd, mode)
+        except OSError as exc:
+            os.close(fd)
+            raise DeploymentError(f"Failed to create {item.target_path}: {exc}") from exc
+        return fd
+
+    def _read_object(self, oid: str) -> bytes:
+        assert self._objects is not None
+        try:
+            data = self._objects.read(oid)
+        except ObjectReadError as exc:
+            raise DeploymentError(f"Failed to read object {oid}: {exc}") from exc
+        if data is None:
+            raise DeploymentError(f"Object {oid} is missing")
+        return data
+
+    def _record_copies(self, copies: Iterable[_PendingCopy]) -> None:
+        for item in copies:
+            if item.change.blob_sha:
+                self._manifest.record(item.change.path, item.change.blob_sha, item.target_path)
+            else:
+                self._manifest.discard(item.change.path)
+
+    def _run_parallel(self, func: Callable[[_T], _R], items: Sequence[_T]) -> list[_R]:
+        """Map `func` over `items` on the worker pool, failing fast."""
+
+        workers = min(self._workers, len(items))
+        if workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deploy") as pool:
+            futures = [pool.submit(func, item) for item in items]
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception():
+                    raise future.exception()  # type: ignore[misc]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    @contextmanager
+    def _phase(report: DeployReport, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            report.timings[name] = time.perf_counter() - started
+            observe_phase(f"deploy_{name}", report.timings[name])
+
+    def _validate_yaml(
+        self,
+        path: Path,
+        blob_sha: str | None = None,
+        *,
+        content: Callable[[], bytes] | None = None,
+    ) -> None:
+        error = self._yaml.validate(path, blob_sha, content=content)
+        if error is not None:
+            raise DeploymentError(f"Invalid YAML in {path}: {error}")
 
     def _guard_path(self, path: Path) -> None:
         try:
@@ -87,3 +520,9 @@ class FileDeployer:
             path.relative_to(self._repo_dir)
         except ValueError as exc:
             raise DeploymentError(f"Unsafe repository path {path}") from exc
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Iterator
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .deployer import FileDeployer
+from .models import DriftStats
+from .transaction import STAGING_DIR_NAME
+
+_LOGGER = logging.getLogger(__name__)
+# Seconds without further events before dirty files are checked, and the
+# longest a continuous stream of events can delay a check.
+_DEBOUNCE = 2.0
+_DEBOUNCE_MAX = 10.0
+# Drifted paths listed in the status; `count` always has the total.
+_MAX_LISTED = 100
+
+
+class DriftMonitor:
+    """Notices hand edits to deployed files.
+
+    Only directories that contain deployed files are watched (inotify on
+    Linux, non-recursively), and events for anything but those files are
+    dropped on the watcher thread. Files touched by events are checked
+    against the deployment manifest once the events settle: unchanged size
+    and mtime confirm a file without reading it, anything else is hashed.
+    The drift set is updated from those checks alone; the tree is scanned
+    only once, at start.
+
+    Deployments pause the checks (`paused`) so the add-on's own writes are
+    not reported; afterwards the watches are refreshed right away and the
+    touched, drifted and newly deployed files are rechecked.
+    """
+
+    def __init__(
+        self,
+        deployer: FileDeployer,
+        on_change: Callable[[DriftStats], Awaitable[None]],
+    ) -> None:
+        self._deployer = deployer
+        self._target_base = deployer.target_base
+        self._on_change = on_change
+        self._managed: frozenset[str] = frozenset()
+        self._watches: dict[Path, object] = {}
+        self._observer: Observer | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._dirty: set[str] = set()
+        self._drift: dict[str, str] = {}
+        self._wake = asyncio.Event()
+        self._paused = 0
+        # Set when a deployment ends; the manifest may list new files.
+        self._deployed = False
+        self._task: asyncio.Task[None] | None = None
+        self.stats = DriftStats()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.start()
+        self._task = self._loop.create_task(self._run())
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Hold back checks while the add-on itself writes deployed files."""
+
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+            if not self._paused:
+                # Files the deployment rewrote may no longer drift.
+                self._dirty.update(self._drift)
+                self._deployed = True
+                self._wake.set()
+
+    def record_repair(self, count: int) -> None:
+        self.stats = self.stats.model_copy(update={"repaired": self.stats.repaired + count})
+
+    def drifted(self) -> dict[str, str]:
+        """Drifted paths and their state ("modified" or "deleted")."""
+
+        return dict(self._drift)
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        observer, self._observer = self._observer, None
+        if observer is not None:
+            await asyncio.to_thread(_stop_observer, observer)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Initial pass over everything deployed, e.g. edits made while stopped.
+        self._dirty.update(await asyncio.to_thread(self._refresh_watches))
+        while True:
+            if self._deployed and not self._paused:
+                self._deployed = False
+                # Newly deployed files are checked once they are watched, so
+                # an edit right after the deployment is not missed.
+                self._dirty.update(await asyncio.to_thread(self._refresh_watches))
+            if self._dirty and not self._paused:
+                paths, self._dirty = self._dirty, set()
+                await self._check(paths)
+                continue
+            self._wake.clear()
+            await self._wake.wait()
+            if self._deployed:
+                continue
+            # Debounce: wait until events stop arriving, up to a limit.
+            deadline = loop.time() + _DEBOUNCE_MAX
+            while (remaining := deadline - loop.time()) > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), min(_DEBOUNCE, remaining))
+                except asyncio.TimeoutError:
+                    break
+            if not self._paused:
+                self._dirty.update(await asyncio.to_thread(self._refresh_watches))
+
+    async def _check(self, paths: Iterable[str]) -> None:
+        results = await asyncio.to_thread(self._inspect, sorted(paths))
+        drift = dict(self._drift)
+        for path, state in results.items():
+            if state is None:
+                drift.pop(path, None)
+            else:
+                drift[path] = state
+        if drift == self._drift:
+            return
+        added = drift.keys() - self._drift.keys()
+        if added:
+            _LOGGER.warning(
+                "%d deployed file(s) changed outside git: %s",
+                len(added),
+                ", ".join(sorted(added)[:10]),
+            )
+        self._drift = drift
+        self.stats = DriftStats(
+            count=len(drift),
+            paths=dict(sorted(drift.items())[:_MAX_LISTED]),
+            changed_at=datetime.now(timezone.utc),
+            repaired=self.stats.repaired,
+        )
+        await self._on_change(self.stats)
+
+    def _inspect(self, paths: list[str]) -> dict[str, str | None]:
+        """Drift state of each path: "modified", "deleted" or None (in sync)."""
+
+        manifest = self._deployer.manifest
+        results: dict[str, str | None] = {}
+        for path in paths:
+            entry = manifest.get(path)
+            if entry is None:
+                results[path] = None
+                continue
+            target = self._target_base / path
+            if not target.exists():
+                results[path] = "deleted"
+            elif manifest.is_current(path, entry.blob, target, entry.size):
+                results[path] = None
+            else:
+                results[path] = "modified"
+        return results
+
+    def _refresh_watches(self) -> frozenset[str]:
+        """Watch exactly the directories holding deployed files.
+
+        Returns the paths that were not managed before; events for them
+        were dropped until now.
+        """
+
+        observer = self._observer
+        if observer is None:
+            return frozenset()
+        managed = frozenset(self._deployer.manifest.paths())
+        if managed == self._managed and self._watches:
+            return frozenset()
+        added = managed - self._managed
+        self._managed = managed
+        directories = {(self._target_base / path).parent for path in managed}
+        for directory in self._watches.keys() - directories:
+            observer.unschedule(self._watches.pop(directory))
+        handler = _EventHandler(self)
+        for directory in directories - self._watches.keys():
+            try:
+                self._watches[directory] = observer.schedule(handler, str(directory))
+            except OSError as exc:
+                _LOGGER.debug("Cannot watch %s: %s", directory, exc)
+        return added
+
+    # Called on the watchdog thread.
+    def _observe(self, path: str) -> None:
+        try:
+            relative = Path(path).relative_to(self._target_base).as_posix()
+        except ValueError:
+            return
+        if relative.startswith(STAGING_DIR_NAME) or relative not in self._managed:
+            return
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._mark, relative)
+
+    def _mark(self, path: str) -> None:
+        self._dirty.add(path)
+        self._wake.set()
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, monitor: DriftMonitor) -> None:
+        self._monitor = monitor
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        self._monitor._observe(event.src_path)
+        dest = getattr(event, "dest_path", "")
+        if dest:
+            self._monitor._observe(dest)
+
+
+def _stop_observer(observer: Observer) -> None:
+    observer.stop()
+    observer.join()
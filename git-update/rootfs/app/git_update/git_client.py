@@ -1,16 +1,54 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+import shutil
+import tempfile
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Sequence
 
 import git
 
-from .config import Options, REPO_DIR
-from .models import FileChange
+from .config import Options, REPO_DIR, STATE_DIR
+from .metrics import GIT_COMMANDS_TOTAL, phase_timer
+from .models import FileChange, RemoteProbeStats
 
 _LOGGER = logging.getLogger(__name__)
+_PARTIAL_CLONE_FILTER = "blob:none"
+# Deployed commits kept as rollback targets; refs keep their objects alive.
+_DEPLOYED_REF_PREFIX = "refs/git-update/deployed/"
+_RETAINED_DEPLOYMENTS = 10
+
+
+class RollbackError(RuntimeError):
+    """Raised when there is no usable commit to roll back to."""
+
+
+class _InstrumentedGit(git.Git):
+    """Counts git subprocesses per subcommand."""
+
+    def execute(self, command, *args, **kwargs):  # type: ignore[no-untyped-def, override]
+        GIT_COMMANDS_TOTAL.inc(command=_subcommand(command))
+        return super().execute(command, *args, **kwargs)
+
+
+class _Repo(git.Repo):
+    GitCommandWrapperType = _InstrumentedGit
+
+
+def _subcommand(command: str | list[str] | tuple[str, ...]) -> str:
+    if isinstance(command, str):
+        command = command.split()
+    args = iter(command[1:])
+    for arg in args:
+        if arg == "-c":
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return "git"
 
 
 @dataclass
@@ -20,13 +58,32 @@ class GitSyncResult:
     branch: str
     changes: list[FileChange]
     initial: bool = False
+    # Tree id of `after`, identifying the deployed content.
+    tree: str | None = None
 
 
 class GitRepoManager:
-    def __init__(self, options: Options, repo_dir: Path = REPO_DIR) -> None:
+    def __init__(
+        self,
+        options: Options,
+        repo_dir: Path = REPO_DIR,
+        state_dir: Path = STATE_DIR,
+    ) -> None:
         self._options = options
         self._repo_dir = repo_dir
+        self._probe_cache = state_dir / "remote_head.json"
+        self._deployments_path = state_dir / "deployments.json"
+        self._filter = options.path_filter()
+        self._bare = options.bare_repo
         self._repo: git.Repo | None = None
+        self._needs_full_deploy = False
+        # Deployed commits, oldest first, and the remote commit syncs skip.
+        self.deployments: list[str] = []
+        self.rejected_commit: str | None = None
+        # include/exclude patterns of the last deployment.
+        self._deployed_paths = self._path_patterns()
+        self._load_deployments()
+        self.probe_stats = RemoteProbeStats(**self._load_probe_cache())
         if not self._options.verify_ssl:
             git.Git().update_environment(GIT_SSL_NO_VERIFY="true")
 
@@ -35,8 +92,17 @@ class GitRepoManager:
             return self._repo
         if self._repo_dir.exists():
             if (self._repo_dir / ".git").exists():
-                self._repo = git.Repo(self._repo_dir)
-                return self._repo
+                repo = _Repo(self._repo_dir)
+                checkout = repo.bare and not self._bare
+                if repo.bare != self._bare:
+                    repo = self._convert_layout(repo)
+                self._repo = repo
+                if self._options.partial_clone:
+                    self._enable_partial_clone(repo)
+                self._configure_sparse_checkout(repo)
+                if checkout:
+                    repo.git.reset("--hard")
+                return repo
             if any(self._repo_dir.iterdir()):
                 raise RuntimeError(
                     f"Existing directory {self._repo_dir} is not a Git repository"
@@ -48,13 +114,135 @@ class GitRepoManager:
         clone_kwargs: dict[str, object] = {"branch": self._options.branch}
         if self._depth_arg:
             clone_kwargs["depth"] = self._depth_arg
-        self._repo = git.Repo.clone_from(
-            self._auth_repo_url,
-            self._repo_dir,
-            **clone_kwargs,
-        )
+        if self._options.partial_clone:
+            clone_kwargs["filter"] = _PARTIAL_CLONE_FILTER
+            if self._sparse_directories is not None:
+                # Check out root files only; the cone is set right after.
+                clone_kwargs["sparse"] = True
+        if self._bare:
+            clone_kwargs["bare"] = True
+        with phase_timer("clone"):
+            self._repo = _Repo.clone_from(
+                self._auth_repo_url,
+                self._repo_dir / ".git" if self._bare else self._repo_dir,
+                **clone_kwargs,
+            )
+        if self._bare:
+            # Bare clones copy the remote branches as local ones and track
+            # nothing; fetches keep `origin/<branch>` like a regular clone.
+            self._repo.git.config("remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+            self._repo.git.update_ref(f"refs/remotes/origin/{self._options.branch}", "HEAD")
+        self._configure_sparse_checkout(self._repo)
         return self._repo
 
+    def local_repo(self) -> git.Repo | None:
+        """The repository if it was cloned already; never clones."""
+
+        if self._repo is None and not (self._repo_dir / ".git").exists():
+            return None
+        return self.ensure_repo()
+
+    @property
+    def _sparse_directories(self) -> list[str] | None:
+        """Cone directories to check out, or None for the whole tree."""
+
+        if not self._options.partial_clone or self._bare:
+            return None
+        return self._filter.directories()
+
+    def _convert_layout(self, repo: git.Repo) -> git.Repo:
+        """Switch an existing clone between a working tree and `bare_repo`.
+
+        The history is kept either way. A bare repository keeps no working
+        tree files and no index; the checkout is restored by the caller
+        once the sparse cone is configured.
+        """
+
+        if self._bare:
+            _LOGGER.info("Converting %s to a bare repository", self._repo_dir)
+            # Sparse checkout settings stay; git ignores them without a
+            # working tree and a later checkout reuses the cone.
+            repo.git.config("core.bare", "true")
+            for entry in self._repo_dir.iterdir():
+                if entry.name == ".git":
+                    continue
+                if entry.is_dir() and not entry.is_symlink():
+                    shutil.rmtree(entry)
+                else:
+                    entry.unlink()
+            (self._repo_dir / ".git" / "index").unlink(missing_ok=True)
+        else:
+            _LOGGER.info("Checking out a working tree in %s", self._repo_dir)
+            repo.git.config("core.bare", "false")
+        return _Repo(self._repo_dir)
+
+    def _enable_partial_clone(self, repo: git.Repo) -> None:
+        """Turn an existing full clone into a promisor so fetches skip blobs.
+
+        Objects that are already present stay; only new history is fetched
+        without file contents.
+        """
+
+        if self._read_config(repo, "remote.origin.promisor") == "true":
+            return
+        _LOGGER.info("Converting %s to a partial clone", self._repo_dir)
+        repo.git.config("remote.origin.promisor", "true")
+        repo.git.config("remote.origin.partialclonefilter", _PARTIAL_CLONE_FILTER)
+
+    def _configure_sparse_checkout(self, repo: git.Repo) -> None:
+        """Apply (or lift) the cone derived from `include_paths`.
+
+        Blobs of a partial clone are only downloaded when checked out, so the
+        cone limits both the working tree and network transfer.
+        """
+
+        directories = self._sparse_directories
+        if directories is not None:
+            directories = self._cone_directories(repo, directories)
+        sparse = self._read_config(repo, "core.sparseCheckout") == "true"
+        if directories is None:
+            if sparse and not self._bare:
+                _LOGGER.info("Disabling sparse checkout")
+                repo.git.sparse_checkout("disable")
+            return
+        if sparse and repo.git.sparse_checkout("list").splitlines() == directories:
+            return
+        _LOGGER.info("Sparse checkout of %s", ", ".join(directories) or "repository root")
+        repo.git.sparse_checkout("set", "--cone", *directories)
+
+    def _cone_directories(self, repo: git.Repo, directories: list[str]) -> list[str]:
+        """Replace literal include paths that name files by their directory.
+
+        Cone mode only takes directories; a file in the repository root is
+        checked out anyway. Paths missing from HEAD stay as they are and are
+        resolved again after the next fetch.
+        """
+
+        literal = [directory for directory in directories if directory in self._filter.include]
+        if not literal:
+            return directories
+        output = repo.git(literal_pathspecs=True).ls_tree("-z", "HEAD", "--", *literal)
+        files: set[str] = set()
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            meta, path = entry.split("\t", maxsplit=1)
+            if meta.split(" ")[1] != "tree":
+                files.add(path)
+        cone = {
+            directory.rpartition("/")[0] if directory in files else directory
+            for directory in directories
+        }
+        cone.discard("")
+        return sorted(cone)
+
+    @staticmethod
+    def _read_config(repo: git.Repo, key: str) -> str | None:
+        try:
+            return repo.git.config("--get", key).strip().lower()
+        except git.GitCommandError:
+            return None
+
     @property
     def _depth_arg(self) -> int | None:
         return None if self._options.git_depth == 0 else self._options.git_depth
@@ -68,16 +256,59 @@ class GitRepoManager:
         return self._options.repo_url
 
     def sync(self) -> GitSyncResult:
+        fresh_clone = self._repo is None and not (self._repo_dir / ".git").exists()
         repo = self.ensure_repo()
-        before = self._safe_head(repo)
+        # A fresh clone has nothing deployed yet, so treat it as an initial sync.
+        initial = fresh_clone or self._needs_full_deploy
+        before = None if initial else self._safe_head(repo)
         branch = self._options.branch
+        if self._options.remote_probe and before is not None:
+            with phase_timer("probe"):
+                remote_head = self._probe_remote_head(repo, branch)
+            if remote_head is not None and remote_head in (before, self.rejected_commit):
+                self.probe_stats.hits += 1
+                _LOGGER.debug("Remote %s unchanged @ %s, skipping fetch", branch, remote_head[:7])
+                return GitSyncResult(before, before, branch, [])
+            self.probe_stats.misses += 1
+        with phase_timer("fetch"):
+            self._fetch(repo, branch)
+            if self._sparse_directories is not None:
+                # Literal include paths are resolved against the new tree.
+                self._configure_sparse_checkout(repo)
+        after = self._safe_head(repo)
+        if after is not None and after == self.rejected_commit:
+            _LOGGER.info("Remote still at rolled back commit %s, keeping deployed tree", after[:7])
+            if before is not None:
+                self._reset(repo, before)
+            return GitSyncResult(before, before, branch, [])
+        if self.rejected_commit is not None:
+            self.rejected_commit = None
+            self._save_deployments()
+        self._needs_full_deploy = False
+        with phase_timer("diff"):
+            if initial and after:
+                changes = self._collect_all_files(repo)
+            else:
+                changes = self._collect_changes(repo, before, after)
+        if after:
+            self._prefetch_blobs(repo, after, changes)
+        tree = repo.head.commit.tree.hexsha if after else None
+        return GitSyncResult(before, after, branch, changes, initial, tree)
+
+    def _fetch(self, repo: git.Repo, branch: str) -> None:
         origin = repo.remotes.origin
         fetch_kwargs = {}
         if self._depth_arg:
             fetch_kwargs["depth"] = self._depth_arg
+        if self._bare:
+            origin.fetch(f"+refs/heads/{branch}:refs/remotes/origin/{branch}", **fetch_kwargs)
+            # Without a working tree there is nothing to merge; move the
+            # branch to the remote tip like the reset below would.
+            repo.git.update_ref(f"refs/heads/{branch}", f"refs/remotes/origin/{branch}")
+            repo.git.symbolic_ref("HEAD", f"refs/heads/{branch}")
+            return
         origin.fetch(branch, **fetch_kwargs)
         repo.git.checkout(branch)
-        initial = before is None
         try:
             repo.git.pull("--ff-only", "origin", branch)
         except git.GitCommandError:
@@ -87,32 +318,276 @@ class GitRepoManager:
             )
             origin.fetch(branch, force=True, **fetch_kwargs)
             repo.git.reset("--hard", f"origin/{branch}")
-        after = self._safe_head(repo)
-        if initial and after:
-            changes = self._collect_all_files(repo)
+
+    def reject(self, commit: str | None, restore_to: str | None) -> None:
+        """Return the checkout to `restore_to` after a rolled back deployment.
+
+        Syncs skip `commit` until the remote moves past it, so a broken push
+        is not redeployed on every poll. `None` keeps the current rejection.
+        """
+
+        if commit is not None:
+            self.rejected_commit = commit
+            self._save_deployments()
+        repo = self.ensure_repo()
+        if restore_to is None:
+            # Nothing was deployed before; redeploy the full tree next time.
+            self._needs_full_deploy = True
+            return
+        self._reset(repo, restore_to)
+
+    def rollback_target(self, commit: str | None = None) -> str:
+        """Resolve the commit a rollback deploys, without network access.
+
+        Defaults to the deployment before the current one; an explicit
+        `commit` must already be present in the local repository.
+        """
+
+        repo = self.ensure_repo()
+        head = self._safe_head(repo)
+        if head is None:
+            raise RollbackError("Nothing has been deployed yet")
+        if commit is None:
+            earlier = self.deployments
+            if head in earlier:
+                earlier = earlier[: earlier.index(head)]
+            if not earlier:
+                raise RollbackError("No earlier deployment is retained")
+            target = earlier[-1]
         else:
-            changes = self._collect_changes(repo, before, after)
-        return GitSyncResult(before, after, branch, changes, initial)
+            try:
+                target = repo.git.rev_parse("--verify", "--quiet", f"{commit}^{{commit}}")
+            except git.GitCommandError as exc:
+                raise RollbackError(f"Commit {commit} is not available locally") from exc
+        if target == head:
+            raise RollbackError(f"Commit {target[:7]} is already deployed")
+        return target
+
+    def rollback(self, target: str) -> GitSyncResult:
+        """Check out `target` and diff the deployed tree against it."""
+
+        repo = self.ensure_repo()
+        before = self._safe_head(repo)
+        with phase_timer("diff"):
+            changes = self._collect_changes(repo, before, target)
+        self._prefetch_blobs(repo, target, changes)
+        self._reset(repo, target)
+        tree = repo.head.commit.tree.hexsha
+        return GitSyncResult(before, target, self._options.branch, changes, tree=tree)
+
+    def record_deployment(self, result: GitSyncResult, *, rollback: bool = False) -> None:
+        """Remember a successful deployment as a future rollback target.
+
+        After a rollback, later deployments are forgotten and the last
+        fetched remote commit is skipped until the branch moves, so the
+        next poll does not bring the rolled back changes straight back.
+        """
+
+        commit = result.after
+        if commit is None:
+            return
+        repo = self.ensure_repo()
+        if rollback:
+            if commit in self.deployments:
+                del self.deployments[self.deployments.index(commit) + 1 :]
+            self.rejected_commit = self._remote_commit(repo) or result.before
+            if self.rejected_commit == commit:
+                # Rolled "forward" to the branch tip; nothing to hold back.
+                self.rejected_commit = None
+        if not self.deployments or self.deployments[-1] != commit:
+            if commit in self.deployments:
+                self.deployments.remove(commit)
+            self.deployments.append(commit)
+        self._deployed_paths = self._path_patterns()
+        retained = set(self.deployments[-_RETAINED_DEPLOYMENTS:])
+        del self.deployments[:-_RETAINED_DEPLOYMENTS]
+        try:
+            for ref in repo.git.for_each_ref("--format=%(refname)", _DEPLOYED_REF_PREFIX).split():
+                if ref[len(_DEPLOYED_REF_PREFIX) :] not in retained:
+                    repo.git.update_ref("-d", ref)
+            repo.git.update_ref(f"{_DEPLOYED_REF_PREFIX}{commit}", commit)
+        except git.GitCommandError as exc:
+            _LOGGER.warning("Unable to keep deployed commit %s: %s", commit[:7], exc)
+        self._save_deployments()
+
+    def _path_patterns(self) -> dict[str, list[str]]:
+        return {"include": self._options.include_paths, "exclude": self._options.exclude_paths}
+
+    def _remote_commit(self, repo: git.Repo) -> str | None:
+        """Branch tip as of the last fetch (no network access)."""
+
+        try:
+            return repo.git.rev_parse("--verify", "--quiet", f"origin/{self._options.branch}")
+        except git.GitCommandError:
+            return None
+
+    def _load_deployments(self) -> None:
+        try:
+            with self._deployments_path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Ignoring unreadable deployment log %s: %s", self._deployments_path, exc)
+            return
+        if data.get("branch") != self._options.branch:
+            return
+        self.deployments = [
+            commit for commit in data.get("deployments", []) if isinstance(commit, str)
+        ]
+        self.rejected_commit = data.get("rejected_commit")
+        paths = data.get("paths")
+        if paths is None:
+            # Written before the filter was recorded; assume it is unchanged.
+            self._save_deployments()
+        elif paths != self._deployed_paths:
+            # Files that just became included are unchanged in git, so only a
+            # full deployment brings them over (the manifest skips the rest).
+            _LOGGER.info("include_paths/exclude_paths changed, redeploying all files")
+            self._deployed_paths = paths
+            self._needs_full_deploy = True
+
+    def _save_deployments(self) -> None:
+        data = {
+            "branch": self._options.branch,
+            "deployments": self.deployments,
+            "rejected_commit": self.rejected_commit,
+            "paths": self._deployed_paths,
+        }
+        directory = self._deployments_path.parent
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=".deployments-", dir=directory)
+        except OSError as exc:
+            _LOGGER.warning("Unable to persist deployment log: %s", exc)
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(tmp_name, self._deployments_path)
+        except OSError as exc:
+            Path(tmp_name).unlink(missing_ok=True)
+            _LOGGER.warning("Unable to persist deployment log: %s", exc)
+
+    def read_file(self, commit: str, path: str) -> str | None:
+        """Content of `path` at `commit`, or None when it does not exist there."""
+
+        try:
+            return self.ensure_repo().git.show(f"{commit}:{path}")
+        except git.GitCommandError:
+            return None
+
+    def head_files(self, paths: Sequence[str]) -> list[FileChange]:
+        """`paths` as they are in HEAD, as changes that redeploy them.
+
+        Paths that are not files in HEAD are left out.
+        """
+
+        if not paths:
+            return []
+        repo = self.ensure_repo()
+        output = repo.git(literal_pathspecs=True).ls_tree("-r", "-z", "HEAD", "--", *paths)
+        changes: list[FileChange] = []
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            meta, path = entry.split("\t", maxsplit=1)
+            mode, object_type, sha = meta.split(" ")
+            if object_type == "blob":
+                changes.append(
+                    FileChange(path=path, change_type="modified", blob_sha=sha, mode=mode)
+                )
+        return changes
+
+    def _probe_remote_head(self, repo: git.Repo, branch: str) -> str | None:
+        """Ask the remote for the branch tip without fetching any objects.
+
+        Returns `None` when the tip cannot be determined (unknown ref, tag,
+        network error) so the caller falls back to a full fetch.
+        """
+
+        try:
+            output = repo.git.ls_remote("origin", f"refs/heads/{branch}")
+        except git.GitCommandError as exc:
+            _LOGGER.debug("Remote probe failed, falling back to fetch: %s", exc)
+            return None
+        remote_head = None
+        for line in output.splitlines():
+            sha, _, ref = line.partition("\t")
+            if ref == f"refs/heads/{branch}":
+                remote_head = sha
+                break
+        self.probe_stats.remote_head = remote_head
+        self.probe_stats.checked_at = datetime.now(timezone.utc)
+        self._save_probe_cache()
+        return remote_head
+
+    def _load_probe_cache(self) -> dict[str, object]:
+        try:
+            with self._probe_cache.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        if data.get("branch") != self._options.branch:
+            return {}
+        return {
+            "remote_head": data.get("remote_head"),
+            "checked_at": data.get("checked_at"),
+        }
+
+    def _save_probe_cache(self) -> None:
+        data = {
+            "branch": self._options.branch,
+            "remote_head": self.probe_stats.remote_head,
+            "checked_at": (
+                self.probe_stats.checked_at.isoformat()
+                if self.probe_stats.checked_at
+                else None
+            ),
+        }
+        try:
+            self._probe_cache.parent.mkdir(parents=True, exist_ok=True)
+            with self._probe_cache.open("w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+        except OSError as exc:
+            _LOGGER.debug("Unable to persist remote probe cache: %s", exc)
 
     def _collect_changes(
         self, repo: git.Repo, before: str | None, after: str | None
     ) -> list[FileChange]:
         if not before or not after or before == after:
             return []
-        diff_output = repo.git.diff("--name-status", f"{before}..{after}")
+        diff_output = repo.git.diff(
+            "--raw", "--no-abbrev", f"{before}..{after}", "--", *self._filter.pathspecs()
+        )
+        return self._apply_filter(self._parse_raw_diff(diff_output))
+
+    def _parse_raw_diff(self, diff_output: str) -> list[FileChange]:
         changes: list[FileChange] = []
         for line in diff_output.splitlines():
             if not line.strip():
                 continue
-            status, path, *rest = line.split("\t")
+            meta, path, *rest = line.split("\t")
+            # ":<old mode> <new mode> <old sha> <new sha> <status>"
+            _, new_mode, _, new_sha, status = meta.lstrip(":").split(" ")
+            blob_sha = None if set(new_sha) == {"0"} else new_sha
+            mode = None if set(new_mode) == {"0"} else new_mode
             if status.startswith("R"):
                 new_path = rest[0] if rest else path
                 changes.append(
-                    FileChange(path=new_path, change_type="renamed", previous_path=path)
+                    FileChange(
+                        path=new_path,
+                        change_type="renamed",
+                        previous_path=path,
+                        blob_sha=blob_sha,
+                        mode=mode,
+                    )
                 )
                 continue
             change_type = self._map_status(status)
-            changes.append(FileChange(path=path, change_type=change_type))
+            changes.append(
+                FileChange(path=path, change_type=change_type, blob_sha=blob_sha, mode=mode)
+            )
         return changes
 
     @staticmethod
@@ -124,14 +599,107 @@ class GitRepoManager:
         }
         return mapping.get(status, "modified")
 
-    @staticmethod
-    def _collect_all_files(repo: git.Repo) -> list[FileChange]:
-        tree = repo.git.ls_tree("-r", "HEAD", "--name-only")
-        return [
-            FileChange(path=line.strip(), change_type="added")
-            for line in tree.splitlines()
-            if line.strip()
-        ]
+    def _apply_filter(self, changes: list[FileChange]) -> list[FileChange]:
+        """Drop paths outside include/exclude; git already did most of the work."""
+
+        if not self._filter.active:
+            return changes
+        result: list[FileChange] = []
+        for change in changes:
+            keep_new = self._filter.matches(change.path)
+            if change.change_type != "renamed" or not change.previous_path:
+                if keep_new:
+                    result.append(change)
+                continue
+            keep_old = self._filter.matches(change.previous_path)
+            if keep_new and keep_old:
+                result.append(change)
+            elif keep_new:
+                result.append(
+                    FileChange(
+                        path=change.path,
+                        change_type="added",
+                        blob_sha=change.blob_sha,
+                        mode=change.mode,
+                    )
+                )
+            elif keep_old:
+                result.append(FileChange(path=change.previous_path, change_type="deleted"))
+        return result
+
+    def _collect_all_files(self, repo: git.Repo) -> list[FileChange]:
+        if self._filter.active:
+            # ls-tree has no pathspec magic; diff against the empty tree does.
+            empty_tree = repo.git.hash_object("-t", "tree", os.devnull)
+            diff_output = repo.git.diff(
+                "--raw",
+                "--no-abbrev",
+                "--no-renames",
+                empty_tree,
+                "HEAD",
+                "--",
+                *self._filter.pathspecs(),
+            )
+            return self._apply_filter(self._parse_raw_diff(diff_output))
+        tree = repo.git.ls_tree("-r", "HEAD")
+        changes: list[FileChange] = []
+        for line in tree.splitlines():
+            if not line.strip():
+                continue
+            # "<mode> <type> <sha>\t<path>"
+            meta, path = line.split("\t", maxsplit=1)
+            mode, object_type, sha = meta.split(" ")
+            changes.append(
+                FileChange(
+                    path=path,
+                    change_type="added",
+                    blob_sha=sha if object_type == "blob" else None,
+                    mode=mode,
+                )
+            )
+        return changes
+
+    def _prefetch_blobs(self, repo: git.Repo, commit: str, changes: list[FileChange]) -> None:
+        """Download the missing blobs of a bare partial clone in one request.
+
+        Deploying reads the blobs from the object database, where git would
+        otherwise fetch each missing one on its own.
+        """
+
+        if not (self._bare and self._options.partial_clone):
+            return
+        wanted = {change.blob_sha for change in changes if change.blob_sha}
+        if not wanted:
+            return
+        # Lists the objects of `commit`'s tree; missing ones are marked "?".
+        listing = repo.git.rev_list("--objects", "--no-walk", "--missing=print", commit)
+        missing = sorted(
+            wanted.intersection(
+                line[1:].split(" ", 1)[0] for line in listing.splitlines() if line.startswith("?")
+            )
+        )
+        if not missing:
+            return
+        _LOGGER.debug("Fetching %d blob(s) for deployment", len(missing))
+        with phase_timer("prefetch"), tempfile.TemporaryFile() as wants:
+            wants.write("".join(f"{sha}\n" for sha in missing).encode())
+            wants.seek(0)
+            # Like git's own lazy fetch: without "have" lines the remote
+            # cannot assume the blobs of our commits are present.
+            repo.git(c="fetch.negotiationAlgorithm=noop").fetch(
+                "origin",
+                "--no-tags",
+                "--no-write-fetch-head",
+                "--recurse-submodules=no",
+                f"--filter={_PARTIAL_CLONE_FILTER}",
+                "--stdin",
+                istream=wants,
+            )
+
+    def _reset(self, repo: git.Repo, commit: str) -> None:
+        """Point the branch at `commit`, updating the working tree if any."""
+
+        repo.git.reset("--soft" if self._bare else "--hard", commit)
 
     @staticmethod
     def _safe_head(repo: git.Repo) -> str | None:
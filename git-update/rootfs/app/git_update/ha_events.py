@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import json
+import time
 from typing import Any
 
 import httpx
 
 from .config import Options
+from .ha_websocket import HAWebSocket, WebSocketCommandError
+from .metrics import HA_REQUEST_ERRORS_TOTAL, HA_REQUEST_SECONDS
 
 _LOGGER = logging.getLogger(__name__)
 SUPERVISOR_API = os.getenv("SUPERVISOR_API", "http://supervisor")
 SUPERVISOR_TOKEN_ENV = os.getenv("SUPERVISOR_TOKEN")
+# Service errors raised by Home Assistant itself, e.g. an invalid configuration.
+_HA_ERROR_CODE = "home_assistant_error"
 
 
 class HAEventClient:
@@ -32,6 +38,18 @@ class HAEventClient:
             )
 
         self._client = httpx.AsyncClient(timeout=20, verify=self._verify_ssl)
+        self._ws: HAWebSocket | None = None
+        if options.ha_transport == "websocket":
+            if self._supervisor_token:
+                self._ws = HAWebSocket(
+                    f"{_websocket_url(SUPERVISOR_API)}/core/websocket", self._supervisor_token
+                )
+            elif self._fallback_token:
+                self._ws = HAWebSocket(
+                    f"{_websocket_url(self._base_url)}/api/websocket",
+                    self._fallback_token,
+                    self._verify_ssl,
+                )
 
     async def check_config(self) -> tuple[bool | None, str | None]:
         """Run `check_config` and wait for the outcome.
@@ -40,6 +58,19 @@ class HAEventClient:
         when validation was skipped (e.g. no token available).
         """
 
+        if self._ws is not None:
+            try:
+                if await self._ws_command(
+                    "check_config",
+                    {"type": "call_service", "domain": "homeassistant", "service": "check_config"},
+                    fallback_on_timeout=True,
+                ):
+                    return True, None
+            except WebSocketCommandError as exc:
+                if exc.code == _HA_ERROR_CODE:
+                    return False, exc.message or "Unknown configuration error"
+                _LOGGER.warning("check_config over websocket failed (%s), using REST", exc)
+
         if self._supervisor_token:
             try:
                 return await self._check_config_via_supervisor()
@@ -81,7 +112,7 @@ class HAEventClient:
             "Content-Type": "application/json",
         }
 
-        resp = await self._client.post(url, json={}, headers=headers)
+        resp = await self._post("core_check", url, json={}, headers=headers)
         resp.raise_for_status()
         payload = resp.json()
         data = payload.get("data", payload)
@@ -106,7 +137,7 @@ class HAEventClient:
             "Content-Type": "application/json",
         }
 
-        resp = await self._client.post(url, json={}, headers=headers)
+        resp = await self._post("check_config", url, json={}, headers=headers)
         resp.raise_for_status()
         data = resp.json()
 
@@ -139,16 +170,33 @@ class HAEventClient:
         except TypeError:
             return str(value)
 
-    async def fire_event(self, payload: dict[str, Any]) -> None:
+    async def fire_event(
+        self, payload: dict[str, Any] | str, event_name: str | None = None
+    ) -> None:
+        """Fire `event_name` (default: the configured event) with `payload`.
+
+        `payload` may already be serialized JSON so it is encoded only once.
+        """
+
         token: str | None
         url: str
+        event_name = event_name or self._event_name
+
+        if isinstance(payload, str):
+            message: dict[str, Any] = {"type": "fire_event", "event_type": event_name}
+            if await self._ws_command("fire_event", message, raw={"event_data": payload}):
+                return
+        elif await self._ws_command(
+            "fire_event", {"type": "fire_event", "event_type": event_name, "event_data": payload}
+        ):
+            return
 
         if self._supervisor_token:
             token = self._supervisor_token
-            url = f"{SUPERVISOR_API}/core/api/events/{self._event_name}"
+            url = f"{SUPERVISOR_API}/core/api/events/{event_name}"
         elif self._fallback_token:
             token = self._fallback_token
-            url = f"{self._base_url}/api/events/{self._event_name}"
+            url = f"{self._base_url}/api/events/{event_name}"
         else:
             _LOGGER.warning("HA token unavailable, skipping event emission")
             return
@@ -157,8 +205,100 @@ class HAEventClient:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
-        resp = await self._client.post(url, json=payload, headers=headers)
+        if isinstance(payload, str):
+            resp = await self._post(
+                "fire_event", url, content=payload.encode("utf-8"), headers=headers
+            )
+        else:
+            resp = await self._post("fire_event", url, json=payload, headers=headers)
+        resp.raise_for_status()
+
+    async def call_service(self, domain: str, service: str) -> None:
+        """Call `domain.service` without service data and wait for it to finish."""
+
+        if await self._ws_command(
+            "call_service",
+            {"type": "call_service", "domain": domain, "service": service, "service_data": {}},
+        ):
+            return
+
+        if self._supervisor_token:
+            token = self._supervisor_token
+            url = f"{SUPERVISOR_API}/core/api/services/{domain}/{service}"
+        elif self._fallback_token:
+            token = self._fallback_token
+            url = f"{self._base_url}/api/services/{domain}/{service}"
+        else:
+            raise RuntimeError("HA token unavailable, cannot call services")
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        resp = await self._post("call_service", url, json={}, headers=headers)
         resp.raise_for_status()
 
+    async def _ws_command(
+        self,
+        endpoint: str,
+        message: dict[str, Any],
+        raw: dict[str, str] | None = None,
+        *,
+        fallback_on_timeout: bool = False,
+    ) -> bool:
+        """Run `message` over the websocket session.
+
+        Returns False when the session is unavailable and the REST API
+        should be used instead. A command that was sent but timed out is
+        only retried over REST when `fallback_on_timeout` says that is safe.
+        """
+
+        if self._ws is None:
+            return False
+        label = f"ws_{endpoint}"
+        started = time.perf_counter()
+        try:
+            await self._ws.command(message, raw)
+        except ConnectionError as exc:
+            _LOGGER.debug("Websocket unavailable for %s, using REST: %s", endpoint, exc)
+            return False
+        except asyncio.TimeoutError:
+            HA_REQUEST_ERRORS_TOTAL.inc(endpoint=label)
+            if fallback_on_timeout:
+                _LOGGER.warning("%s over websocket timed out, using REST", endpoint)
+                return False
+            raise
+        except WebSocketCommandError:
+            HA_REQUEST_ERRORS_TOTAL.inc(endpoint=label)
+            raise
+        finally:
+            HA_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=label)
+        return True
+
+    async def _post(self, endpoint: str, url: str, **kwargs: Any) -> httpx.Response:
+        """POST through the shared client, recording latency and failures."""
+
+        started = time.perf_counter()
+        try:
+            resp = await self._client.post(url, **kwargs)
+        except httpx.HTTPError:
+            HA_REQUEST_ERRORS_TOTAL.inc(endpoint=endpoint)
+            raise
+        finally:
+            HA_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+        if resp.is_error:
+            HA_REQUEST_ERRORS_TOTAL.inc(endpoint=endpoint)
+        return resp
+
     async def aclose(self) -> None:
+        if self._ws is not None:
+            await self._ws.aclose()
         await self._client.aclose()
+
+
+def _websocket_url(http_url: str) -> str:
+    if http_url.startswith("https://"):
+        return "wss://" + http_url[len("https://") :]
+    if http_url.startswith("http://"):
+        return "ws://" + http_url[len("http://") :]
+    return http_url
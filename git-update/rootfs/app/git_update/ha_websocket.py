@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import ssl
+import time
+from itertools import count
+from typing import Any
+
+import websockets
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+_LOGGER = logging.getLogger(__name__)
+_CONNECT_TIMEOUT = 10
+_REQUEST_TIMEOUT = 20
+_BACKOFF_MIN = 1.0
+_BACKOFF_MAX = 60.0
+_CONNECT_ERRORS = (OSError, ValueError, asyncio.TimeoutError, InvalidHandshake, ConnectionClosed)
+
+
+class WebSocketCommandError(Exception):
+    """Home Assistant answered a command with `success: false`."""
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+
+
+class HAWebSocket:
+    """One authenticated Home Assistant websocket API session.
+
+    Commands are multiplexed over the connection: each gets the next
+    message id and a future that the reader task resolves when the result
+    with that id arrives. The session is opened on first use and reopened
+    after a disconnect; while a reconnect is backing off, commands fail
+    fast with `ConnectionError` so callers can use the REST API instead.
+    """
+
+    def __init__(self, url: str, token: str, verify_ssl: bool = True) -> None:
+        self._url = url
+        self._token = token
+        self._ssl: ssl.SSLContext | None = None
+        if url.startswith("wss://"):
+            self._ssl = ssl.create_default_context()
+            if not verify_ssl:
+                self._ssl.check_hostname = False
+                self._ssl.verify_mode = ssl.CERT_NONE
+        self._connection: Any = None
+        self._reader: asyncio.Task[None] | None = None
+        self._connect_lock = asyncio.Lock()
+        self._ids = count(1)
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._backoff = _BACKOFF_MIN
+        self._retry_at = 0.0
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    async def command(
+        self, message: dict[str, Any], raw: dict[str, str] | None = None
+    ) -> Any:
+        """Send `message` and return the command's result.
+
+        `raw` maps further fields to values that are already serialized
+        JSON, so large payloads are not encoded twice.
+        """
+
+        connection = await self._ensure_connected()
+        message_id = next(self._ids)
+        text = json.dumps({"id": message_id, **message}, separators=(",", ":"))
+        if raw:
+            extra = ",".join(f"{json.dumps(key)}:{value}" for key, value in raw.items())
+            text = f"{text[:-1]},{extra}}}"
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await connection.send(text)
+            return await asyncio.wait_for(future, _REQUEST_TIMEOUT)
+        except ConnectionClosed as exc:
+            raise ConnectionError(f"Home Assistant websocket closed: {exc}") from exc
+        finally:
+            self._pending.pop(message_id, None)
+
+    async def _ensure_connected(self) -> Any:
+        if self._connection is not None:
+            return self._connection
+        async with self._connect_lock:
+            if self._connection is not None:
+                return self._connection
+            if self._closed:
+                raise ConnectionError("Home Assistant websocket is closed")
+            if time.monotonic() < self._retry_at:
+                raise ConnectionError("Home Assistant websocket reconnect pending")
+            try:
+                connection = await self._connect()
+            except _CONNECT_ERRORS as exc:
+                self._schedule_retry()
+                raise ConnectionError(f"Home Assistant websocket unavailable: {exc}") from exc
+            self._backoff = _BACKOFF_MIN
+            self._connection = connection
+            self._reader = asyncio.get_running_loop().create_task(self._read(connection))
+            _LOGGER.info("Connected to Home Assistant websocket API at %s", self._url)
+            return connection
+
+    async def _connect(self) -> Any:
+        connection = await websockets.connect(
+            self._url, ssl=self._ssl, open_timeout=_CONNECT_TIMEOUT, max_size=None
+        )
+        try:
+            async with asyncio.timeout(_CONNECT_TIMEOUT):
+                greeting = json.loads(await connection.recv())
+                if greeting.get("type") != "auth_required":
+                    raise ConnectionError(f"Unexpected greeting {greeting.get('type')!r}")
+                await connection.send(json.dumps({"type": "auth", "access_token": self._token}))
+                reply = json.loads(await connection.recv())
+            if reply.get("type") != "auth_ok":
+                raise ConnectionError(reply.get("message") or "authentication failed")
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
+
+    async def _read(self, connection: Any) -> None:
+        try:
+            async for text in connection:
+                message = json.loads(text)
+                future = self._pending.get(message.get("id"))
+                if future is None or future.done() or message.get("type") != "result":
+                    continue
+                if message.get("success"):
+                    future.set_result(message.get("result"))
+                else:
+                    error = message.get("error") or {}
+                    future.set_exception(
+                        WebSocketCommandError(
+                            str(error.get("code", "unknown_error")), str(error.get("message", ""))
+                        )
+                    )
+        except (ConnectionClosed, ValueError) as exc:
+            _LOGGER.warning("Home Assistant websocket disconnected: %s", exc)
+        finally:
+            self._connection = None
+            if not self._closed:
+                self._schedule_retry()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Home Assistant websocket disconnected"))
+
+    def _schedule_retry(self) -> None:
+        self._retry_at = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, _BACKOFF_MAX)
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._connection is not None:
+            await self._connection.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from .models import HistoryEntry
+
+_LOGGER = logging.getLogger(__name__)
+# Bump when the table layout changes; older journals are discarded.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS syncs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    commit_after TEXT,
+    outcome TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS syncs_commit ON syncs (commit_after);
+CREATE INDEX IF NOT EXISTS syncs_outcome ON syncs (outcome, id);
+CREATE TABLE IF NOT EXISTS sync_paths (
+    path TEXT NOT NULL,
+    sync_id INTEGER NOT NULL,
+    PRIMARY KEY (path, sync_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sync_paths_sync ON sync_paths (sync_id);
+"""
+
+
+class SyncHistory:
+    """Size-bounded journal of past syncs.
+
+    Entries live in an SQLite database in WAL mode: appends are single
+    transactions, a crash at worst loses the entry being written, and
+    recovery is a WAL replay rather than a scan. Changed paths and commits
+    are indexed, so filtered reads and cursor pagination never load more
+    than one page. Only the newest `max_entries` syncs are kept.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if max_entries > 0:
+            self._db = self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def record(self, entry: HistoryEntry) -> int | None:
+        """Append `entry` and drop the oldest entries beyond the limit."""
+
+        if self._db is None:
+            return None
+        data = entry.model_dump_json(exclude={"id"})
+        paths = set(_changed_paths(entry))
+        try:
+            with self._lock, self._db:
+                cursor = self._db.execute(
+                    "INSERT INTO syncs (commit_after, outcome, entry) VALUES (?, ?, ?)",
+                    (entry.commit_after, entry.outcome, data),
+                )
+                sync_id = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO sync_paths (path, sync_id) VALUES (?, ?)",
+                    ((path, sync_id) for path in paths),
+                )
+                cutoff = sync_id - self._max_entries
+                if cutoff > 0:
+                    self._db.execute("DELETE FROM sync_paths WHERE sync_id <= ?", (cutoff,))
+                    self._db.execute("DELETE FROM syncs WHERE id <= ?", (cutoff,))
+        except sqlite3.Error as exc:
+            _LOGGER.warning("Failed to record sync history: %s", exc)
+            return None
+        return sync_id
+
+    def page(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int = 50,
+        path: str | None = None,
+        outcome: str | None = None,
+    ) -> tuple[list[HistoryEntry], str | None]:
+        """Return up to `limit` entries, newest first, and the next cursor.
+
+        `path` matches entries that changed that file (as new or previous
+        path); a trailing `/` matches everything below a directory.
+        """
+
+        if self._db is None:
+            return [], None
+        clauses: list[str] = []
+        params: list[object] = []
+        if cursor:
+            try:
+                params.append(int(cursor))
+            except ValueError as exc:
+                raise ValueError(f"Invalid cursor {cursor!r}") from exc
+            clauses.append("id < ?")
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if path:
+            path = path.lstrip("/")
+            if path.endswith("/"):
+                # "dir/" .. "dir0" covers every path below dir ('0' follows '/').
+                clauses.append("id IN (SELECT sync_id FROM sync_paths WHERE path >= ? AND path < ?)")
+                params.extend((path, path[:-1] + "0"))
+            else:
+                clauses.append("id IN (SELECT sync_id FROM sync_paths WHERE path = ?)")
+                params.append(path)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(
+            f"SELECT id, entry FROM syncs {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1),
+        )
+        entries = [self._load(row) for row in rows[:limit]]
+        next_cursor = str(entries[-1].id) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def for_commit(self, commit: str) -> HistoryEntry | None:
+        """Newest entry that synced to `commit` (full or abbreviated sha)."""
+
+        if self._db is None:
+            return None
+        commit = commit.lower()
+        if len(commit) == 40:
+            rows = self._query(
+                "SELECT id, entry FROM syncs WHERE commit_after = ? ORDER BY id DESC LIMIT 1",
+                (commit,),
+            )
+        else:
+            # Hex prefix: every sha starting with it sorts before prefix + 'g'.
+            rows = self._query(
+                "SELECT id, entry FROM syncs WHERE commit_after >= ? AND commit_after < ? "
+                "ORDER BY id DESC LIMIT 1",
+                (commit, commit + "g"),
+            )
+        return self._load(rows[0]) if rows else None
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+    def _query(self, sql: str, params: tuple[object, ...]) -> list[tuple[int, str]]:
+        assert self._db is not None
+        try:
+            with self._lock:
+                return self._db.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            _LOGGER.warning("Failed to read sync history: %s", exc)
+            return []
+
+    @staticmethod
+    def _load(row: tuple[int, str]) -> HistoryEntry:
+        entry = HistoryEntry.model_validate_json(row[1])
+        entry.id = row[0]
+        return entry
+
+    def _open(self) -> sqlite3.Connection | None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(2):
+            db: sqlite3.Connection | None = None
+            try:
+                db = sqlite3.connect(self._path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    db.executescript(
+                        "DROP TABLE IF EXISTS syncs; DROP TABLE IF EXISTS sync_paths;"
+                        f"{_SCHEMA} PRAGMA user_version={SCHEMA_VERSION};"
+                    )
+                return db
+            except sqlite3.DatabaseError as exc:
+                if db is not None:
+                    db.close()
+                if attempt:
+                    _LOGGER.error("Sync history disabled, cannot open %s: %s", self._path, exc)
+                    return None
+                _LOGGER.warning("Discarding unreadable sync history %s: %s", self._path, exc)
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(f"{self._path}{suffix}")
+                    except FileNotFoundError:
+                        pass
+        return None
+
+
+def _changed_paths(entry: HistoryEntry) -> Iterator[str]:
+    for change in entry.changes:
+        yield change.path
+        if change.previous_path:
+            yield change.previous_path
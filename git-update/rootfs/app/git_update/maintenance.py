@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import git
+
+from .config import Options, STATE_DIR
+from .git_client import GitRepoManager
+from .metrics import GIT_MAINTENANCE_RECLAIMED_BYTES_TOTAL, GIT_MAINTENANCE_SECONDS
+from .models import MaintenanceStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RepoMaintenance:
+    """Periodic housekeeping of a source's local repository.
+
+    Every poll leaves a few loose objects or a small pack behind, and with
+    `git_depth` each fetch moves the shallow boundary while the history
+    behind it stays on disk. A run drops unreachable reflog entries, packs
+    refs, prunes unreachable objects (which also trims stale shallow
+    entries) and repacks:
+
+    - shallow clones are repacked into a single pack, which drops the
+      history that fell out of the depth window; git does not write
+      commit-graphs for shallow repositories.
+    - full clones are repacked incrementally (`--geometric`) and get an
+      updated commit-graph.
+
+    The caller holds the source's sync lock, so no other git process uses
+    the repository and unreachable objects can be pruned immediately.
+    Deployed commits stay reachable through their refs and are never
+    pruned.
+    """
+
+    def __init__(
+        self, options: Options, repo: GitRepoManager, state_dir: Path = STATE_DIR
+    ) -> None:
+        self._interval = options.git_maintenance_interval
+        self._shallow = options.git_depth > 0
+        self._repo = repo
+        self._state_path = state_dir / "maintenance.json"
+        self.stats = self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self._interval > 0
+
+    def due(self) -> bool:
+        if not self.enabled:
+            return False
+        last_run = self.stats.last_run
+        if last_run is None:
+            return True
+        return (datetime.now(timezone.utc) - last_run).total_seconds() >= self._interval
+
+    def run(self) -> MaintenanceStats:
+        """Run every maintenance step and return the updated stats."""
+
+        repo = self._repo.local_repo()
+        if repo is None:
+            return self.stats
+        git_dir = Path(repo.git_dir)
+        size_before = _disk_usage(git_dir)
+        started = time.perf_counter()
+        error: str | None = None
+        try:
+            self._run_steps(repo)
+        except git.GitCommandError as exc:
+            error = str(exc)
+            _LOGGER.warning("Git maintenance failed: %s", exc)
+        duration = time.perf_counter() - started
+        size_after = _disk_usage(git_dir)
+        # A fresh commit-graph or pack can outweigh what was pruned.
+        reclaimed = max(size_before - size_after, 0)
+        GIT_MAINTENANCE_SECONDS.observe(duration)
+        if reclaimed:
+            GIT_MAINTENANCE_RECLAIMED_BYTES_TOTAL.inc(reclaimed)
+        _LOGGER.info(
+            "Git maintenance finished in %.2fs, reclaimed %d bytes (%d bytes left)",
+            duration,
+            reclaimed,
+            size_after,
+        )
+        self.stats = MaintenanceStats(
+            runs=self.stats.runs + 1,
+            last_run=datetime.now(timezone.utc),
+            duration=duration,
+            reclaimed_bytes=reclaimed,
+            repository_bytes=size_after,
+            error=error,
+        )
+        self._save()
+        return self.stats
+
+    def _run_steps(self, repo: git.Repo) -> None:
+        # Old HEAD positions are the main thing keeping dropped history alive.
+        repo.git.reflog("expire", "--expire-unreachable=now", "--all")
+        repo.git.pack_refs("--all")
+        repo.git.prune("--expire=now")
+        if self._shallow:
+            repo.git.repack("-a", "-d", "-l", "-q")
+            return
+        # Rolls loose objects and the small packs of recent fetches into
+        # larger ones so that pack sizes form a geometric progression;
+        # the big pack of the clone is rewritten only rarely.
+        repo.git.repack("-d", "-l", "-q", "--geometric=2")
+        repo.git.maintenance("run", "--quiet", "--task=commit-graph")
+
+    def _load(self) -> MaintenanceStats:
+        try:
+            with self._state_path.open("r", encoding="utf-8") as handle:
+                stats = MaintenanceStats(**json.load(handle))
+        except FileNotFoundError:
+            return MaintenanceStats()
+        except (OSError, ValueError, TypeError) as exc:
+            _LOGGER.warning("Ignoring unreadable maintenance state %s: %s", self._state_path, exc)
+            return MaintenanceStats()
+        # Older versions saved negative values for runs that grew the repository.
+        return stats.model_copy(update={"reclaimed_bytes": max(stats.reclaimed_bytes, 0)})
+
+    def _save(self) -> None:
+        try:
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=".maintenance-", dir=self._state_path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(self.stats.model_dump_json())
+            os.replace(tmp_name, self._state_path)
+        except OSError as exc:
+            _LOGGER.warning("Failed to persist maintenance state: %s", exc)
+
+
+def _disk_usage(path: Path) -> int:
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                continue
+    return total
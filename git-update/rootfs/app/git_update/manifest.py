@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    blob: str
+    size: int
+    mtime_ns: int
+
+
+class DeploymentManifest:
+    """Persistent map of deployed paths to the git blob they hold.
+
+    Entries are trusted only while the target file still has the recorded
+    size and mtime; anything else falls back to hashing the target.
+    """
+
+    def __init__(self, path: Path, target_base: Path) -> None:
+        self._path = path
+        self._target_base = str(target_base)
+        self._entries: dict[str, ManifestEntry] = self._load()
+        # Deploy workers check and record entries concurrently.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> ManifestEntry | None:
+        return self._entries.get(path)
+
+    def paths(self) -> list[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def is_current(self, path: str, blob: str, target: Path, size: int) -> bool:
+        """Return True when `target` already holds the `size` bytes of `blob`."""
+
+        try:
+            stat = target.stat()
+        except OSError:
+            return False
+        entry = self._entries.get(path)
+        if entry is not None and entry.blob == blob:
+            if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                return True
+        # Unknown or stale entry: compare content when the size allows a match.
+        if stat.st_size != size or not target.is_file():
+            return False
+        if hash_blob(target) != blob:
+            return False
+        with self._lock:
+            self._entries[path] = ManifestEntry(blob, stat.st_size, stat.st_mtime_ns)
+        return True
+
+    def record(self, path: str, blob: str, target: Path) -> None:
+        stat = target.stat()
+        with self._lock:
+            self._entries[path] = ManifestEntry(blob, stat.st_size, stat.st_mtime_ns)
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def save(self) -> None:
+        """Atomically replace the manifest file with the current entries."""
+
+        with self._lock:
+            files = {path: asdict(entry) for path, entry in self._entries.items()}
+        data = {"version": MANIFEST_VERSION, "target": self._target_base, "files": files}
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".manifest-", dir=self._path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, separators=(",", ":"))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_name, self._path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _load(self) -> dict[str, ManifestEntry]:
+        try:
+            with self._path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Ignoring unreadable deployment manifest %s: %s", self._path, exc)
+            return {}
+        if data.get("version") != MANIFEST_VERSION or data.get("target") != self._target_base:
+            return {}
+        entries: dict[str, ManifestEntry] = {}
+        for path, raw in data.get("files", {}).items():
+            try:
+                entries[path] = ManifestEntry(**raw)
+            except TypeError:
+                continue
+        return entries
+
+
+def hash_blob(path: Path) -> str:
+    """Compute the git blob id of a file without spawning git."""
+
+    size = path.stat().st_size
+    digest = hashlib.sha1(f"blob {size}\0".encode("ascii"))
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
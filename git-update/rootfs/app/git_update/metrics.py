@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Sequence, TypeVar
+
+# Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._labelset = frozenset(self.labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if labels.keys() != self._labelset:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _render_labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+_MetricT = TypeVar("_MetricT", bound=_Metric)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> dict[tuple[str, ...], float]:
+        """Current values keyed by label values (in `labelnames` order)."""
+
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._render_labels(key)} {_format(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last)], sum.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self._buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self._values.items()
+            )
+        lines: list[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self._buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{self._render_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._render_labels(key)} {_format(total)}")
+            lines.append(f"{self.name}_count{self._render_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered on demand.
+
+    Recording a sample is a dict update under a lock; the text format is
+    only produced when `/metrics` is scraped.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: _MetricT) -> _MetricT:
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics.append(metric)
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+SYNC_PHASE_SECONDS = REGISTRY.histogram(
+    "git_update_sync_phase_seconds",
+    "Time spent in each sync phase.",
+    ("phase",),
+)
+SYNC_SECONDS = REGISTRY.histogram(
+    "git_update_sync_seconds",
+    "Wall time of complete syncs by source and outcome.",
+    ("source", "outcome"),
+)
+SYNCS_TOTAL = REGISTRY.counter(
+    "git_update_syncs_total",
+    "Completed syncs by source, trigger reason and outcome.",
+    ("source", "reason", "outcome"),
+)
+FILES_DEPLOYED_TOTAL = REGISTRY.counter(
+    "git_update_files_deployed_total",
+    "Files handled by deployments (copied, skipped as unchanged, removed).",
+    ("action",),
+)
+BYTES_COPIED_TOTAL = REGISTRY.counter(
+    "git_update_bytes_copied_total",
+    "Bytes written to the target directory.",
+)
+COPY_FILES_TOTAL = REGISTRY.counter(
+    "git_update_copy_files_total",
+    "Files written to the target directory by copy strategy.",
+    ("strategy",),
+)
+COPY_BYTES_TOTAL = REGISTRY.counter(
+    "git_update_copy_bytes_total",
+    "Bytes of deployed files by copy strategy.",
+    ("strategy",),
+)
+COPY_SECONDS_TOTAL = REGISTRY.counter(
+    "git_update_copy_seconds_total",
+    "Time spent copying deployed files by copy strategy.",
+    ("strategy",),
+)
+GIT_COMMANDS_TOTAL = REGISTRY.counter(
+    "git_update_git_commands_total",
+    "git subprocess invocations by subcommand.",
+    ("command",),
+)
+CONFIG_CHECKS_TOTAL = REGISTRY.counter(
+    "git_update_config_checks_total",
+    "Home Assistant config check decisions (checked, skipped, cached).",
+    ("decision",),
+)
+HA_REQUEST_SECONDS = REGISTRY.histogram(
+    "git_update_ha_request_seconds",
+    "Latency of Home Assistant and Supervisor API requests.",
+    ("endpoint",),
+)
+HA_REQUEST_ERRORS_TOTAL = REGISTRY.counter(
+    "git_update_ha_request_errors_total",
+    "Failed Home Assistant and Supervisor API requests.",
+    ("endpoint",),
+)
+MQTT_PUBLISH_SECONDS = REGISTRY.histogram(
+    "git_update_mqtt_publish_seconds",
+    "Time from queueing an MQTT message until the broker acknowledged it.",
+)
+MQTT_PUBLISH_ERRORS_TOTAL = REGISTRY.counter(
+    "git_update_mqtt_publish_errors_total",
+    "MQTT messages that could not be delivered.",
+)
+NOTIFICATIONS_DELIVERED_TOTAL = REGISTRY.counter(
+    "git_update_notifications_delivered_total",
+    "Notifications delivered from the outbox by sink.",
+    ("sink",),
+)
+NOTIFICATION_FAILURES_TOTAL = REGISTRY.counter(
+    "git_update_notification_failures_total",
+    "Failed outbox delivery attempts by sink; each is retried.",
+    ("sink",),
+)
+NOTIFICATIONS_DROPPED_TOTAL = REGISTRY.counter(
+    "git_update_notifications_dropped_total",
+    "Undelivered notifications dropped because the outbox was full.",
+    ("sink",),
+)
+
+GIT_MAINTENANCE_SECONDS = REGISTRY.histogram(
+    "git_update_git_maintenance_seconds",
+    "Duration of background git maintenance runs.",
+)
+GIT_MAINTENANCE_RECLAIMED_BYTES_TOTAL = REGISTRY.counter(
+    "git_update_git_maintenance_reclaimed_bytes_total",
+    "Bytes freed in local repositories by git maintenance.",
+)
+
+
+# Phase timings of the sync running in the current context (see
+# `collect_phases`). `asyncio.to_thread` copies the context, so worker
+# threads add to the same dict.
+_phase_timings: ContextVar[dict[str, float] | None] = ContextVar("phase_timings", default=None)
+
+
+def observe_phase(phase: str, seconds: float) -> None:
+    SYNC_PHASE_SECONDS.observe(seconds, phase=phase)
+    timings = _phase_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase_timer(phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - started)
+
+
+@contextmanager
+def collect_phases() -> Iterator[dict[str, float]]:
+    """Collect the phase timings observed while the block runs."""
+
+    timings: dict[str, float] = {}
+    token = _phase_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _phase_timings.reset(token)
@@ -10,6 +10,18 @@ class FileChange(BaseModel):
     path: str
     change_type: Literal["added", "modified", "deleted", "renamed"]
     previous_path: str | None = None
+    # Git blob id of the new content; internal only, never sent in payloads.
+    blob_sha: str | None = Field(default=None, exclude=True)
+    # Git file mode of the new content ("100644", "100755", "120000", ...).
+    mode: str | None = Field(default=None, exclude=True)
+
+
+class ReloadOutcome(BaseModel):
+    # Reload services called after the deployment, as "domain.service".
+    services: list[str] = Field(default_factory=list)
+    failed: list[str] = Field(default_factory=list)
+    restart_required: bool = False
+    restart_paths: list[str] = Field(default_factory=list)
 
 
 class SyncMetadata(BaseModel):
@@ -19,11 +31,96 @@ class SyncMetadata(BaseModel):
     changes: list[FileChange] = Field(default_factory=list)
     synced_at: datetime
     reason: str
+    merged_reasons: list[str] = Field(default_factory=list)
     initial_sync: bool = False
+    reload: ReloadOutcome | None = None
+
+
+class HistoryEntry(SyncMetadata):
+    id: int | None = None
+    outcome: str
+    error: str | None = None
+    duration: float | None = None
+    # Seconds per sync phase (see /metrics for the phase names).
+    timings: dict[str, float] = Field(default_factory=dict)
+
+
+class HistoryPage(BaseModel):
+    entries: list[HistoryEntry]
+    next_cursor: str | None = None
+
+
+class RemoteProbeStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    remote_head: str | None = None
+    checked_at: datetime | None = None
+
+
+class ConfigCheckStats(BaseModel):
+    checked: int = 0
+    skipped: int = 0
+    cached: int = 0
+    # "checked", "skipped" or "cached", with the reason for the last decision.
+    last_decision: str | None = None
+    last_reason: str | None = None
+    last_tree: str | None = None
+
+
+class ScheduleStats(BaseModel):
+    # Current adaptive poll interval in seconds, before jitter and backoff.
+    interval: float
+    next_run: datetime | None = None
+    consecutive_failures: int = 0
+
+
+class OutboxStats(BaseModel):
+    # Notifications waiting for delivery, in total and per sink.
+    depth: int = 0
+    pending: dict[str, int] = Field(default_factory=dict)
+    oldest_at: datetime | None = None
+    # Last delivery error of each sink that is currently retrying.
+    errors: dict[str, str] = Field(default_factory=dict)
+
+
+class DriftStats(BaseModel):
+    # Deployed files whose content no longer matches git.
+    count: int = 0
+    # Up to 100 drifted paths, each "modified" or "deleted".
+    paths: dict[str, Literal["modified", "deleted"]] = Field(default_factory=dict)
+    changed_at: datetime | None = None
+    # Files redeployed by `drift_policy: redeploy` since startup.
+    repaired: int = 0
+
+
+class MaintenanceStats(BaseModel):
+    # Runs of git maintenance on the local repository, across restarts.
+    runs: int = 0
+    last_run: datetime | None = None
+    duration: float | None = None
+    # Bytes the last run freed in the git directory (0 when new indexes
+    # outweighed what was pruned) and its size afterwards.
+    reclaimed_bytes: int = 0
+    repository_bytes: int | None = None
+    error: str | None = None
 
 
 class StatusResponse(BaseModel):
+    # Increases with every status change; see `/status?since=` and `/events`.
+    version: int | None = None
+    source: str | None = None
     healthy: bool
     last_sync: SyncMetadata | None = None
     pending_reason: str | None = None
     error: str | None = None
+    remote_probe: RemoteProbeStats | None = None
+    config_check: ConfigCheckStats | None = None
+    schedule: ScheduleStats | None = None
+    # Remote commit that is not deployed until the branch moves past it,
+    # after a failed deployment or a rollback.
+    rejected_commit: str | None = None
+    drift: DriftStats | None = None
+    maintenance: MaintenanceStats | None = None
+    outbox: OutboxStats | None = None
+    # Status of every source when more than one is configured.
+    sources: dict[str, StatusResponse] | None = None
@@ -2,52 +2,191 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import threading
+import time
 from dataclasses import dataclass
 from typing import Any
 
 import paho.mqtt.client as mqtt
 
 from .config import MqttSettings
+from .metrics import MQTT_PUBLISH_ERRORS_TOTAL, MQTT_PUBLISH_SECONDS
 
 _LOGGER = logging.getLogger(__name__)
+_KEEPALIVE = 30
+_RECONNECT_MIN_DELAY = 1
+_RECONNECT_MAX_DELAY = 120
+
+
+class MqttPublishError(RuntimeError):
+    """Raised (through the delivery future) when a message cannot be sent."""
 
 
 @dataclass
 class MqttPayload:
     topic: str
-    payload: dict[str, Any]
+    # Either a JSON-serializable dict or an already serialized JSON document.
+    payload: dict[str, Any] | str
     qos: int = 1
     retain: bool = False
 
 
 class MqttPublisher:
+    """Long-lived MQTT session with a bounded publish queue.
+
+    paho runs the network loop on its own thread and reconnects with
+    backoff. `publish` only enqueues the message and returns a future that
+    resolves once the broker acknowledged it (PUBACK for QoS 1, PUBCOMP for
+    QoS 2, socket write for QoS 0).
+    """
+
     def __init__(self, settings: MqttSettings) -> None:
         self._settings = settings
+        self._client: mqtt.Client | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[tuple[MqttPayload, asyncio.Future[None]]] = asyncio.Queue(
+            maxsize=settings.queue_size
+        )
+        self._connected = asyncio.Event()
+        self._sender: asyncio.Task[None] | None = None
+        self._inflight: dict[int, asyncio.Future[None]] = {}
+        self._early_acks: set[int] = set()
+        # Guards _inflight/_early_acks between the asyncio loop and paho's thread.
+        self._lock = threading.Lock()
 
-    async def publish(self, payload: MqttPayload) -> None:
+    def publish(self, payload: MqttPayload) -> asyncio.Future[None]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
         if not self._settings.enabled:
-            return
-        await asyncio.to_thread(self._publish_sync, payload)
+            future.set_result(None)
+            return future
+        self._ensure_started(loop)
+        started = time.perf_counter()
+        future.add_done_callback(lambda done: _record_delivery(done, started))
+        if self._queue.full():
+            _, dropped = self._queue.get_nowait()
+            _LOGGER.warning("MQTT publish queue full, dropping oldest message")
+            if not dropped.done():
+                dropped.set_exception(MqttPublishError("Publish queue full"))
+        self._queue.put_nowait((payload, future))
+        return future
 
-    def _publish_sync(self, payload: MqttPayload) -> None:
+    async def aclose(self) -> None:
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        client, self._client = self._client, None
+        if client is not None:
+            await asyncio.to_thread(self._stop_client, client)
+        error = MqttPublishError("MQTT session closed")
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(error)
+        with self._lock:
+            pending = list(self._inflight.values())
+            self._inflight.clear()
+            self._early_acks.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._client is not None:
+            return
+        self._loop = loop
         client = mqtt.Client()
         if self._settings.username:
             client.username_pw_set(self._settings.username, self._settings.password)
-        try:
-            client.connect(self._settings.host, self._settings.port, keepalive=30)
-            client.publish(
-                payload.topic,
-                json_dumps(payload.payload),
-                qos=payload.qos,
-                retain=payload.retain,
-            )
-            client.disconnect()
-            _LOGGER.debug("Published MQTT message to %s", payload.topic)
-        except Exception as exc:  # noqa: BLE001
-            _LOGGER.error("Failed to publish MQTT message: %s", exc)
-
-
-def json_dumps(data: dict[str, Any]) -> str:
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_publish = self._on_publish
+        client.reconnect_delay_set(_RECONNECT_MIN_DELAY, _RECONNECT_MAX_DELAY)
+        client.connect_async(self._settings.host, self._settings.port, keepalive=_KEEPALIVE)
+        client.loop_start()
+        self._client = client
+        self._sender = loop.create_task(self._send_loop())
+        _LOGGER.debug("Started MQTT session to %s:%s", self._settings.host, self._settings.port)
+
+    async def _send_loop(self) -> None:
+        while True:
+            payload, future = await self._queue.get()
+            while not future.done():
+                await self._connected.wait()
+                client = self._client
+                if client is None:
+                    return
+                body = payload.payload
+                info = client.publish(
+                    payload.topic,
+                    body if isinstance(body, str) else json_dumps(body),
+                    qos=payload.qos,
+                    retain=payload.retain,
+                )
+                if info.rc == mqtt.MQTT_ERR_NO_CONN and payload.qos == 0:
+                    # QoS 0 is not retained by paho; retry after reconnecting.
+                    self._connected.clear()
+                    continue
+                if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+                    future.set_exception(
+                        MqttPublishError(f"Publish failed: {mqtt.error_string(info.rc)}")
+                    )
+                    break
+                # QoS > 0 messages stay queued inside paho across reconnects.
+                with self._lock:
+                    if info.mid in self._early_acks:
+                        self._early_acks.discard(info.mid)
+                        future.set_result(None)
+                    else:
+                        self._inflight[info.mid] = future
+                break
+
+    @staticmethod
+    def _stop_client(client: mqtt.Client) -> None:
+        client.disconnect()
+        client.loop_stop()
+
+    # paho callbacks run on the network thread.
+    def _on_connect(self, client: mqtt.Client, userdata: Any, flags: Any, rc: int) -> None:
+        if rc == mqtt.CONNACK_ACCEPTED:
+            _LOGGER.debug("Connected to MQTT broker %s", self._settings.host)
+            self._call_soon(self._connected.set)
+        else:
+            _LOGGER.error("MQTT broker refused connection: %s", mqtt.connack_string(rc))
+
+    def _on_disconnect(self, client: mqtt.Client, userdata: Any, rc: int) -> None:
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            _LOGGER.warning("MQTT connection lost (%s), reconnecting", mqtt.error_string(rc))
+        self._call_soon(self._connected.clear)
+
+    def _on_publish(self, client: mqtt.Client, userdata: Any, mid: int) -> None:
+        with self._lock:
+            future = self._inflight.pop(mid, None)
+            if future is None:
+                self._early_acks.add(mid)
+                return
+        self._call_soon(_resolve, future)
+        _LOGGER.debug("MQTT message %s delivered", mid)
+
+    def _call_soon(self, callback: Any, *args: Any) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback, *args)
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _record_delivery(future: asyncio.Future[None], started: float) -> None:
+    if future.cancelled() or future.exception() is not None:
+        MQTT_PUBLISH_ERRORS_TOTAL.inc()
+    else:
+        MQTT_PUBLISH_SECONDS.observe(time.perf_counter() - started)
+
+
+def json_dumps(data: Any) -> str:
     import json
 
     return json.dumps(data, separators=(",", ":"))
@@ -1,23 +1,66 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import sqlite3
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Sequence
+from pathlib import Path
+from typing import Any, Callable, Sequence
 
-from .config import Options
+import httpx
+
+from .config import STATE_DIR, Options
 from .ha_events import HAEventClient
-from .models import FileChange
-from .mqtt_client import MqttPayload, MqttPublisher
+from .models import DriftStats, FileChange, OutboxStats, ReloadOutcome
+from .mqtt_client import MqttPayload, MqttPublisher, json_dumps
+from .outbox import NotificationOutbox, OutboxMessage, OutboxSink
 
 _LOGGER = logging.getLogger(__name__)
+# Room left in each chunk for the envelope around the change list.
+_CHUNK_ENVELOPE_BYTES = 512
+# Seconds to wait for the broker to acknowledge an outbox message.
+_MQTT_DELIVERY_TIMEOUT = 30
+# Client errors that may go away on their own; other 4xx answers mean HA
+# will never accept the event, so it is dropped instead of retried.
+_RETRYABLE_STATUS = frozenset({401, 403, 404, 408, 429})
 
 
 class Notifier:
-    def __init__(self, options: Options) -> None:
+    """Sends change and error notifications to Home Assistant and MQTT.
+
+    Messages are serialized once and stored in the notification outbox,
+    which delivers them in the background; with `outbox_size: 0` they are
+    sent directly instead.
+    """
+
+    def __init__(
+        self,
+        options: Options,
+        *,
+        on_outbox_change: Callable[[], None] | None = None,
+        state_dir: Path = STATE_DIR,
+    ) -> None:
         self._options = options
         self._ha = HAEventClient(options)
         self._mqtt_settings = options.mqtt()
         self._mqtt = MqttPublisher(self._mqtt_settings)
+        sinks = {"home_assistant": OutboxSink(self._deliver_ha)}
+        if self._mqtt_settings.enabled:
+            # The publisher keeps queued messages in order; stay within its queue.
+            sinks["mqtt"] = OutboxSink(self._deliver_mqtt, window=self._mqtt_settings.queue_size)
+        self.outbox = NotificationOutbox(
+            state_dir / "outbox.sqlite3", options.outbox_size, sinks, on_outbox_change
+        )
+
+    @property
+    def outbox_stats(self) -> OutboxStats | None:
+        return self.outbox.stats if self.outbox.enabled else None
+
+    def start(self) -> None:
+        """Resume delivering notifications left in the outbox."""
+
+        self.outbox.start()
 
     async def notify(
         self,
@@ -25,24 +68,53 @@ class Notifier:
         branch: str,
         commit: str | None,
         reason: str,
+        reload: ReloadOutcome | None = None,
+        *,
+        source: str | None = None,
     ) -> None:
-        payload = {
-            "event": self._options.ha_event_name,
+        event_name = self._options.ha_event_name
+        payload: dict[str, Any] = {
+            "event": event_name,
+            "source": source,
             "branch": branch,
             "commit": commit,
             "reason": reason,
-            "changes": [change.model_dump() for change in changes],
             "synced_at": datetime.now(timezone.utc).isoformat(),
         }
-        await self._ha.fire_event(payload)
-        await self._mqtt.publish(
-            MqttPayload(
-                topic=self._mqtt_settings.topic,
-                payload=payload,
-                qos=self._mqtt_settings.qos,
-                retain=self._mqtt_settings.retain,
-            )
+        if reload is not None:
+            payload["reload"] = reload.model_dump()
+        mode = self._options.payload_mode
+        if mode == "full":
+            payload["changes"] = [change.model_dump() for change in changes]
+            await self._dispatch([(event_name, self._mqtt_settings.topic, json_dumps(payload))])
+            return
+
+        chunks = (
+            chunk_changes(changes, self._options.payload_chunk_bytes)
+            if mode == "chunked"
+            else []
         )
+        # Chunks go out first so listeners have the full list once the
+        # summary event arrives.
+        messages: list[tuple[str, str, str]] = []
+        for sequence, chunk in enumerate(chunks, start=1):
+            body = json_dumps(
+                {
+                    "event": f"{event_name}.chunk",
+                    "source": source,
+                    "branch": branch,
+                    "commit": commit,
+                    "sequence": sequence,
+                    "total": len(chunks),
+                    "changes": chunk,
+                }
+            )
+            messages.append((f"{event_name}.chunk", f"{self._mqtt_settings.topic}/chunk", body))
+        payload["total_changes"] = len(changes)
+        payload["summary"] = summarize_changes(changes)
+        payload["chunks"] = len(chunks)
+        messages.append((event_name, self._mqtt_settings.topic, json_dumps(payload)))
+        await self._dispatch(messages)
 
     async def notify_error(
         self,
@@ -50,25 +122,130 @@ class Notifier:
         error_message: str,
         branch: str,
         commit: str | None,
+        *,
+        source: str | None = None,
     ) -> None:
         """Fire error event for deployment/validation failures."""
         payload = {
             "event": f"{self._options.ha_event_name}.error",
+            "source": source,
             "error_type": error_type,
             "error_message": error_message,
             "branch": branch,
             "commit": commit,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        await self._ha.fire_event(payload)
-        await self._mqtt.publish(
+        await self._dispatch(
+            [(payload["event"], f"{self._mqtt_settings.topic}/error", json_dumps(payload))]
+        )
+
+    async def notify_drift(
+        self, drift: DriftStats, branch: str, *, source: str | None = None
+    ) -> None:
+        """Report the deployed files that currently differ from git."""
+
+        payload = {
+            "event": f"{self._options.ha_event_name}.drift",
+            "source": source,
+            "branch": branch,
+            **drift.model_dump(mode="json"),
+        }
+        await self._dispatch(
+            [(payload["event"], f"{self._mqtt_settings.topic}/drift", json_dumps(payload))]
+        )
+
+    async def _dispatch(self, messages: list[tuple[str, str, str]]) -> None:
+        """Hand `(event, topic, body)` messages to the outbox, or send them now."""
+
+        if self.outbox.enabled:
+            try:
+                await self.outbox.enqueue(messages)
+                return
+            except sqlite3.Error as exc:
+                _LOGGER.error("Notification outbox unavailable, sending directly: %s", exc)
+        for event_name, topic, body in messages:
+            await self._send(event_name, topic, body)
+
+    async def _deliver_ha(self, message: OutboxMessage) -> None:
+        try:
+            await self._ha.fire_event(message.body, event_name=message.event)
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            if status < 500 and status not in _RETRYABLE_STATUS:
+                _LOGGER.error("Home Assistant rejected event %s (%s), dropping it", message.event, status)
+                return
+            raise
+
+    async def _deliver_mqtt(self, message: OutboxMessage) -> None:
+        delivery = self._mqtt.publish(
+            MqttPayload(
+                topic=message.topic,
+                payload=message.body,
+                qos=self._mqtt_settings.qos,
+                retain=self._mqtt_settings.retain,
+            )
+        )
+        await asyncio.wait_for(delivery, _MQTT_DELIVERY_TIMEOUT)
+
+    async def _send(self, event_name: str, topic: str, body: str) -> None:
+        """Deliver one serialized message to Home Assistant and MQTT."""
+
+        await self._ha.fire_event(body, event_name=event_name)
+        self._publish_mqtt(
             MqttPayload(
-                topic=f"{self._mqtt_settings.topic}/error",
-                payload=payload,
+                topic=topic,
+                payload=body,
                 qos=self._mqtt_settings.qos,
                 retain=self._mqtt_settings.retain,
             )
         )
 
+    def _publish_mqtt(self, message: MqttPayload) -> asyncio.Future[None]:
+        """Queue a message on the shared MQTT session without awaiting delivery."""
+
+        delivery = self._mqtt.publish(message)
+        delivery.add_done_callback(_log_mqtt_failure)
+        return delivery
+
     async def aclose(self) -> None:
+        await self.outbox.aclose()
         await self._ha.aclose()
+        await self._mqtt.aclose()
+
+
+def summarize_changes(changes: Sequence[FileChange]) -> dict[str, dict[str, int]]:
+    """Count changes per change type and per top-level directory."""
+
+    by_type = Counter(change.change_type for change in changes)
+    by_directory = Counter(
+        change.path.split("/", 1)[0] if "/" in change.path else "."
+        for change in changes
+    )
+    return {"by_type": dict(by_type), "by_directory": dict(by_directory)}
+
+
+def chunk_changes(changes: Sequence[FileChange], max_bytes: int) -> list[list[dict[str, Any]]]:
+    """Split changes into lists whose serialized size stays below `max_bytes`."""
+
+    budget = max(max_bytes - _CHUNK_ENVELOPE_BYTES, 1)
+    chunks: list[list[dict[str, Any]]] = []
+    current: list[dict[str, Any]] = []
+    size = 0
+    for change in changes:
+        item = change.model_dump()
+        item_size = len(json_dumps(item).encode("utf-8")) + 1
+        if current and size + item_size > budget:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += item_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _log_mqtt_failure(delivery: asyncio.Future[None]) -> None:
+    if delivery.cancelled():
+        return
+    if (exc := delivery.exception()) is not None:
+        _LOGGER.error("Failed to publish MQTT message: %s", exc)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import logging
+import subprocess
+import threading
+from pathlib import Path
+from typing import IO, Iterator, NamedTuple, Sequence
+
+from .metrics import GIT_COMMANDS_TOTAL
+
+_LOGGER = logging.getLogger(__name__)
+_CHUNK_SIZE = 1024 * 1024
+# Answers for names that do not resolve to an object; the file is missing.
+_UNRESOLVED = frozenset({"missing", "ambiguous", "dangling", "notdir"})
+# Answers followed by a payload line (the link target or the failed name).
+# `symlink` means a link leaves the repository.
+_WITH_PAYLOAD = frozenset({"symlink", "loop", "dangling", "notdir"})
+
+
+class ObjectReadError(RuntimeError):
+    """Raised when the `git cat-file` process fails or answers unexpectedly."""
+
+
+class ObjectInfo(NamedTuple):
+    oid: str
+    # "blob", "tree", "commit", or "symlink"/"loop" for unusable links.
+    type: str
+    size: int
+
+
+class GitObjectReader:
+    """Read objects through one `git cat-file --batch-command` process.
+
+    Names are anything git resolves (`<blob id>`, `HEAD:<path>`); symlinks
+    inside the repository are followed. Lookups are serialized, so the
+    reader can be shared by worker threads; `info_many` and
+    `contents_many` pipeline a whole list of objects instead of waiting for
+    each answer. The process starts on first use and lives until `close`.
+    """
+
+    def __init__(self, git_dir: Path) -> None:
+        self._git_dir = git_dir
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[bytes] | None = None
+
+    def __enter__(self) -> GitObjectReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def info(self, name: str) -> ObjectInfo | None:
+        """Type and size of `name`, or None when it does not exist."""
+
+        return self.info_many([name])[0]
+
+    def info_many(self, names: Sequence[str]) -> list[ObjectInfo | None]:
+        if not names:
+            return []
+        request = b"".join(b"info " + _encode(name) + b"\n" for name in names)
+        with self._lock:
+            process = self._start()
+            # A separate writer keeps both pipes moving for long lists.
+            writer = threading.Thread(
+                target=_feed, args=(process.stdin, request), name="cat-file-feed", daemon=True
+            )
+            writer.start()
+            try:
+                return [self._read_header(process) for _ in names]
+            except BaseException:
+                self._stop(kill=True)
+                raise
+            finally:
+                writer.join()
+
+    def read(self, name: str) -> bytes | None:
+        """Content of `name`, or None when it does not exist."""
+
+        with self._lock:
+            process = self._request(b"contents", name)
+            try:
+                info = self._read_header(process)
+                if info is None:
+                    return None
+                data = _read_exactly(process.stdout, info.size)  # type: ignore[arg-type]
+                _read_exactly(process.stdout, 1)  # type: ignore[arg-type]
+            except BaseException:
+                self._stop(kill=True)
+                raise
+        return data
+
+    def contents_many(
+        self, names: Sequence[str]
+    ) -> Iterator[tuple[ObjectInfo | None, Iterator[bytes]]]:
+        """Content of each of `names`, in order, as chunk iterators.
+
+        All requests are sent up front, so git streams the objects back to
+        back. Each chunk iterator must be used before advancing to the next
+        object (chunks left unread are skipped); the process is held until
+        the iterator is exhausted or closed.
+        """
+
+        if not names:
+            return
+        request = b"".join(b"contents " + _encode(name) + b"\n" for name in names)
+        with self._lock:
+            process = self._start()
+            stdout: IO[bytes] = process.stdout  # type: ignore[assignment]
+            writer = threading.Thread(
+                target=_feed, args=(process.stdin, request), name="cat-file-feed", daemon=True
+            )
+            writer.start()
+            try:
+                for _ in names:
+                    info = self._read_header(process)
+                    if info is None:
+                        yield None, iter(())
+                        continue
+                    remaining = [info.size]
+                    yield info, _chunks(stdout, remaining)
+                    while remaining[0]:
+                        remaining[0] -= len(
+                            _read_exactly(stdout, min(remaining[0], _CHUNK_SIZE))
+                        )
+                    _read_exactly(stdout, 1)
+            except BaseException:
+                self._stop(kill=True)
+                raise
+            finally:
+                writer.join()
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _request(self, command: bytes, name: str) -> subprocess.Popen[bytes]:
+        process = self._start()
+        try:
+            process.stdin.write(command + b" " + _encode(name) + b"\n")  # type: ignore[union-attr]
+            process.stdin.flush()  # type: ignore[union-attr]
+        except OSError as exc:
+            self._stop(kill=True)
+            raise ObjectReadError(f"git cat-file exited: {exc}") from exc
+        return process
+
+    def _read_header(self, process: subprocess.Popen[bytes]) -> ObjectInfo | None:
+        stdout: IO[bytes] = process.stdout  # type: ignore[assignment]
+        line = stdout.readline()
+        if not line.endswith(b"\n"):
+            raise ObjectReadError(f"git cat-file exited with status {process.poll()}")
+        header = line[:-1].decode("utf-8", "surrogateescape")
+        parts = header.split(" ")
+        if len(parts) == 3 and parts[2].isdigit():
+            return ObjectInfo(parts[0], parts[1], int(parts[2]))
+        if len(parts) == 2 and parts[0] in _WITH_PAYLOAD and parts[1].isdigit():
+            _read_exactly(stdout, int(parts[1]) + 1)
+            if parts[0] in _UNRESOLVED:
+                return None
+            return ObjectInfo("", parts[0], 0)
+        if parts[-1] in _UNRESOLVED:
+            return None
+        raise ObjectReadError(f"Unexpected git cat-file response: {header!r}")
+
+    def _start(self) -> subprocess.Popen[bytes]:
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        GIT_COMMANDS_TOTAL.inc(command="cat-file")
+        try:
+            self._process = subprocess.Popen(
+                [
+                    "git",
+                    f"--git-dir={self._git_dir}",
+                    "cat-file",
+                    "--batch-command",
+                    "--follow-symlinks",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                bufsize=_CHUNK_SIZE,
+            )
+        except OSError as exc:
+            raise ObjectReadError(f"Cannot start git cat-file: {exc}") from exc
+        _LOGGER.debug("Started git cat-file for %s", self._git_dir)
+        return self._process
+
+    def _stop(self, *, kill: bool = False) -> None:
+        # After a failure the stream position is unknown, so the process is
+        # killed rather than asked to finish; that also unblocks the writer.
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if kill:
+            process.kill()
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()  # type: ignore[union-attr]
+            except (OSError, ValueError):
+                pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _encode(name: str) -> bytes:
+    if "\n" in name:
+        raise ValueError(f"Object name {name!r} contains a newline")
+    return name.encode("utf-8", "surrogateescape")
+
+
+def _feed(stream: IO[bytes] | None, data: bytes) -> None:
+    try:
+        stream.write(data)  # type: ignore[union-attr]
+        stream.flush()  # type: ignore[union-attr]
+    except (OSError, ValueError):
+        # The reader stopped the process; it reports the failure.
+        pass
+
+
+def _chunks(stream: IO[bytes], remaining: list[int]) -> Iterator[bytes]:
+    while remaining[0]:
+        chunk = _read_exactly(stream, min(remaining[0], _CHUNK_SIZE))
+        remaining[0] -= len(chunk)
+        yield chunk
+
+
+def _read_exactly(stream: IO[bytes], size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ObjectReadError("git cat-file output ended early")
+    return data
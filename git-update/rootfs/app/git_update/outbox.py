@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+
+from .metrics import (
+    NOTIFICATION_FAILURES_TOTAL,
+    NOTIFICATIONS_DELIVERED_TOTAL,
+    NOTIFICATIONS_DROPPED_TOTAL,
+)
+from .models import OutboxStats
+
+_LOGGER = logging.getLogger(__name__)
+# Bump when the table layout changes; older outboxes are discarded.
+SCHEMA_VERSION = 1
+_BATCH_SIZE = 100
+_RETRY_MIN = 1.0
+_RETRY_MAX = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    sink TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (sink, message_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS deliveries_message ON deliveries (message_id);
+"""
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    id: int
+    # Home Assistant event name and MQTT topic of the serialized body.
+    event: str
+    topic: str
+    body: str
+    created_at: float
+
+
+@dataclass(frozen=True)
+class OutboxSink:
+    deliver: Callable[[OutboxMessage], Awaitable[None]]
+    # Deliveries started at once and awaited in order. Only sinks that keep
+    # the order of in-flight messages themselves may use more than one.
+    window: int = 1
+
+
+class NotificationOutbox:
+    """Durable queue of serialized notifications, drained per sink.
+
+    Each message is stored once in an SQLite database in WAL mode with one
+    pending delivery per sink. A drainer task per sink delivers its
+    messages in order, a batch at a time, and removes them once delivered.
+    When a delivery fails the sink stops at that message and retries with
+    exponential backoff, so a sink that was down catches up in order.
+    Delivery is at-least-once: a message interrupted mid-delivery is sent
+    again. Only the newest `max_messages` messages are kept.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_messages: int,
+        sinks: dict[str, OutboxSink],
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
+        self._path = path
+        self._max_messages = max_messages
+        self._sinks = sinks
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._db = self._open()
+        self._wake = {name: asyncio.Event() for name in sinks}
+        self._drainers: list[asyncio.Task[None]] = []
+        self._closed = asyncio.Event()
+        self._errors: dict[str, str] = {}
+        self.stats = OutboxStats()
+        if self._db is not None:
+            self.stats = self._stats()
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def start(self) -> None:
+        """Start the drainers; messages left from an earlier run go first."""
+
+        if self._drainers or self._db is None:
+            return
+        loop = asyncio.get_running_loop()
+        self._drainers = [loop.create_task(self._drain(name)) for name in self._sinks]
+
+    async def enqueue(self, messages: Sequence[tuple[str, str, str]]) -> None:
+        """Store `(event, topic, body)` messages for every sink.
+
+        Returns once the messages are on disk; raises `sqlite3.Error` when
+        they could not be stored.
+        """
+
+        await asyncio.to_thread(self._insert, messages)
+        self.start()
+        for wake in self._wake.values():
+            wake.set()
+        self._changed()
+
+    async def aclose(self) -> None:
+        self._closed.set()
+        for drainer in self._drainers:
+            drainer.cancel()
+        await asyncio.gather(*self._drainers, return_exceptions=True)
+        self._drainers = []
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+    async def _drain(self, sink: str) -> None:
+        wake = self._wake[sink]
+        delay = _RETRY_MIN
+        while True:
+            # Cleared before reading so an enqueue during the read is not missed.
+            wake.clear()
+            batch = await asyncio.to_thread(self._pending, sink, _BATCH_SIZE)
+            if not batch:
+                await wake.wait()
+                continue
+            delivered, error = await self._deliver(self._sinks[sink], batch)
+            if delivered:
+                await asyncio.to_thread(self._remove, sink, batch[:delivered])
+                NOTIFICATIONS_DELIVERED_TOTAL.inc(delivered, sink=sink)
+            if error is None:
+                delay = _RETRY_MIN
+                self._errors.pop(sink, None)
+                self._changed()
+                continue
+            NOTIFICATION_FAILURES_TOTAL.inc(sink=sink)
+            self._errors[sink] = str(error) or type(error).__name__
+            self._changed()
+            _LOGGER.warning(
+                "Delivering notification to %s failed, retrying in %.0fs: %s", sink, delay, error
+            )
+            try:
+                await asyncio.wait_for(self._closed.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                delay = min(delay * 2, _RETRY_MAX)
+
+    @staticmethod
+    async def _deliver(
+        sink: OutboxSink, batch: Sequence[OutboxMessage]
+    ) -> tuple[int, Exception | None]:
+        """Deliver `batch` in order; returns how many went out and the error."""
+
+        delivered = 0
+        for start in range(0, len(batch), sink.window):
+            window = batch[start : start + sink.window]
+            deliveries = [asyncio.ensure_future(sink.deliver(message)) for message in window]
+            try:
+                for delivery in deliveries:
+                    try:
+                        await delivery
+                    except Exception as exc:  # noqa: BLE001 - any failure means retry
+                        return delivered, exc
+                    delivered += 1
+            finally:
+                for delivery in deliveries:
+                    delivery.cancel()
+        return delivered, None
+
+    def _changed(self) -> None:
+        if self._db is None:
+            return
+        self.stats = self._stats()
+        if self._on_change is not None:
+            self._on_change()
+
+    def _insert(self, messages: Sequence[tuple[str, str, str]]) -> None:
+        assert self._db is not None
+        now = time.time()
+        with self._lock, self._db:
+            for event, topic, body in messages:
+                cursor = self._db.execute(
+                    "INSERT INTO messages (event, topic, body, created_at) VALUES (?, ?, ?, ?)",
+                    (event, topic, body, now),
+                )
+                self._db.executemany(
+                    "INSERT INTO deliveries (sink, message_id) VALUES (?, ?)",
+                    ((sink, cursor.lastrowid) for sink in self._sinks),
+                )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()
+            excess = count - self._max_messages
+            if excess > 0:
+                cutoff = self._db.execute(
+                    "SELECT id FROM messages ORDER BY id LIMIT 1 OFFSET ?", (excess - 1,)
+                ).fetchone()[0]
+                for sink, dropped in self._db.execute(
+                    "SELECT sink, COUNT(*) FROM deliveries WHERE message_id <= ? GROUP BY sink",
+                    (cutoff,),
+                ).fetchall():
+                    NOTIFICATIONS_DROPPED_TOTAL.inc(dropped, sink=sink)
+                self._db.execute("DELETE FROM deliveries WHERE message_id <= ?", (cutoff,))
+                self._db.execute("DELETE FROM messages WHERE id <= ?", (cutoff,))
+                _LOGGER.warning("Notification outbox full, dropped %d oldest messages", excess)
+
+    def _pending(self, sink: str, limit: int) -> list[OutboxMessage]:
+        assert self._db is not None
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT m.id, m.event, m.topic, m.body, m.created_at FROM deliveries d "
+                "JOIN messages m ON m.id = d.message_id WHERE d.sink = ? "
+                "ORDER BY d.message_id LIMIT ?",
+                (sink, limit),
+            ).fetchall()
+        return [OutboxMessage(*row) for row in rows]
+
+    def _remove(self, sink: str, messages: Sequence[OutboxMessage]) -> None:
+        assert self._db is not None
+        ids = [(message.id,) for message in messages]
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM deliveries WHERE sink = ? AND message_id = ?",
+                ((sink, message_id) for (message_id,) in ids),
+            )
+            self._db.executemany(
+                "DELETE FROM messages WHERE id = ? AND NOT EXISTS "
+                "(SELECT 1 FROM deliveries WHERE message_id = messages.id)",
+                ids,
+            )
+
+    def _stats(self) -> OutboxStats:
+        assert self._db is not None
+        with self._lock:
+            pending = dict(
+                self._db.execute("SELECT sink, COUNT(*) FROM deliveries GROUP BY sink").fetchall()
+            )
+            (oldest,) = self._db.execute("SELECT MIN(created_at) FROM messages").fetchone()
+        return OutboxStats(
+            depth=sum(pending.values()),
+            pending=pending,
+            oldest_at=datetime.fromtimestamp(oldest, timezone.utc) if oldest else None,
+            errors=dict(self._errors),
+        )
+
+    def _open(self) -> sqlite3.Connection | None:
+        if self._max_messages <= 0:
+            return None
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(2):
+            db: sqlite3.Connection | None = None
+            try:
+                db = sqlite3.connect(self._path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    db.executescript(
+                        "DROP TABLE IF EXISTS messages; DROP TABLE IF EXISTS deliveries;"
+                        f"{_SCHEMA} PRAGMA user_version={SCHEMA_VERSION};"
+                    )
+                with db:
+                    # Sinks that were disabled since the messages were stored.
+                    placeholders = ",".join("?" * len(self._sinks))
+                    db.execute(
+                        f"DELETE FROM deliveries WHERE sink NOT IN ({placeholders})",
+                        tuple(self._sinks),
+                    )
+                    db.execute(
+                        "DELETE FROM messages WHERE id NOT IN (SELECT message_id FROM deliveries)"
+                    )
+                return db
+            except sqlite3.DatabaseError as exc:
+                if db is not None:
+                    db.close()
+                if attempt:
+                    _LOGGER.error("Notification outbox disabled, cannot open %s: %s", self._path, exc)
+                    return None
+                _LOGGER.warning("Discarding unreadable notification outbox %s: %s", self._path, exc)
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(f"{self._path}{suffix}")
+                    except FileNotFoundError:
+                        pass
+        return None
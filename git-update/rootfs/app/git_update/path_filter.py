@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, Sequence
+
+_WILDCARDS = frozenset("*?[")
+
+
+class PathFilter:
+    """Include/exclude glob patterns with git `:(glob)` pathspec semantics.
+
+    `*` and `?` stay within one path segment, `**` as a whole segment spans
+    directories, and a pattern without wildcards also matches everything
+    below it as a directory. The same patterns are handed to git as pathspecs so git only
+    reports relevant paths; `matches` applies them to paths in Python.
+    """
+
+    def __init__(self, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> None:
+        self.include = _normalize(include)
+        self.exclude = _normalize(exclude)
+        self._include_re = _compile(self.include)
+        self._exclude_re = _compile(self.exclude)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def matches(self, path: str) -> bool:
+        if self._include_re is not None and not self._include_re.match(path):
+            return False
+        return self._exclude_re is None or not self._exclude_re.match(path)
+
+    def excludes_tree(self, directory: str) -> bool:
+        """True when an exclude pattern covers `directory` and everything below it."""
+
+        for pattern in self.exclude:
+            if pattern.endswith("/**"):
+                pattern = pattern[:-3]
+            if _WILDCARDS.intersection(pattern):
+                continue
+            if directory == pattern or directory.startswith(pattern + "/"):
+                return True
+        return False
+
+    def pathspecs(self) -> list[str]:
+        """Return git pathspec arguments (to be placed after `--`)."""
+
+        if not self.active:
+            return []
+        specs = [f":(glob){pattern}" for pattern in self.include] or [":(glob)**"]
+        specs.extend(f":(exclude,glob){pattern}" for pattern in self.exclude)
+        return specs
+
+    def roots(self) -> list[str]:
+        """Leading literal part of each include pattern ("" for the whole tree)."""
+
+        if not self.include:
+            return [""]
+        roots: set[str] = set()
+        for pattern in self.include:
+            literal: list[str] = []
+            for part in pattern.split("/"):
+                if _WILDCARDS.intersection(part):
+                    break
+                literal.append(part)
+            roots.add("/".join(literal))
+        return sorted(roots)
+
+    def directories(self) -> list[str] | None:
+        """Leading literal directories of the include patterns.
+
+        Used for cone-mode sparse checkout; returns None when a pattern
+        needs the whole tree (no includes, or a wildcard in the first
+        segment).
+        """
+
+        if not self.include:
+            return None
+        directories: set[str] = set()
+        for pattern in self.include:
+            parts = pattern.split("/")
+            literal: list[str] = []
+            for part in parts[:-1]:
+                if _WILDCARDS.intersection(part):
+                    break
+                literal.append(part)
+            if not _WILDCARDS.intersection(pattern):
+                # A literal pattern may name a directory itself.
+                literal = parts
+            if not literal:
+                if "/" in pattern or "**" in pattern:
+                    return None
+                # Cone mode always checks out files in the repository root.
+                continue
+            directories.add("/".join(literal))
+        return sorted(directories)
+
+
+def _normalize(patterns: Iterable[str]) -> list[str]:
+    result: list[str] = []
+    for pattern in patterns:
+        pattern = pattern.strip().lstrip("/").rstrip("/")
+        if pattern and pattern not in result:
+            result.append(pattern)
+    return result
+
+
+def _compile(patterns: Sequence[str]) -> re.Pattern[str] | None:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{_translate(pattern)})" for pattern in patterns) + r"\Z")
+
+
+def _translate(pattern: str) -> str:
+    if not _WILDCARDS.intersection(pattern):
+        return re.escape(pattern) + "(?:/.*)?"
+    out: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if pattern.startswith("**", i):
+            at_segment_start = i == 0 or pattern[i - 1] == "/"
+            if at_segment_start and pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if at_segment_start and i + 2 == n:
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+            i += 2
+        elif char == "*":
+            out.append("[^/]*")
+            i += 1
+        elif char == "?":
+            out.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1 : i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+                i += 1
+                continue
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
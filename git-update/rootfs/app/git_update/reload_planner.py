@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import posixpath
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Sequence
+
+import yaml
+
+from .ha_events import HAEventClient
+from .models import FileChange, ReloadOutcome
+from .yaml_validation import HomeAssistantLoader
+
+_LOGGER = logging.getLogger(__name__)
+
+RELOAD_ALL = "homeassistant.reload_all"
+CORE_CONFIG = "homeassistant.reload_core_config"
+# Integrations whose YAML configuration can be reloaded with `<domain>.reload`.
+RELOADABLE_DOMAINS = frozenset(
+    {
+        "automation",
+        "bayesian",
+        "command_line",
+        "counter",
+        "filter",
+        "generic_thermostat",
+        "group",
+        "history_stats",
+        "input_boolean",
+        "input_button",
+        "input_datetime",
+        "input_number",
+        "input_select",
+        "input_text",
+        "intent_script",
+        "min_max",
+        "mqtt",
+        "person",
+        "python_script",
+        "rest",
+        "rest_command",
+        "scene",
+        "schedule",
+        "script",
+        "statistics",
+        "template",
+        "timer",
+        "trend",
+        "universal",
+        "zone",
+    }
+)
+_DIRECTORY_SERVICES = {
+    "themes": ("frontend.reload_themes",),
+    "python_scripts": ("python_script.reload",),
+    "blueprints/automation": ("automation.reload",),
+    "blueprints/script": ("script.reload",),
+    "blueprints/template": ("template.reload",),
+}
+# Files whose effect cannot be reloaded.
+_RESTART_PREFIXES = ("custom_components/", ".storage/")
+_YAML_SUFFIXES = (".yaml", ".yml")
+_INCLUDE_DIR_TAGS = (
+    "!include_dir_list",
+    "!include_dir_named",
+    "!include_dir_merge_list",
+    "!include_dir_merge_named",
+)
+
+
+@dataclass
+class ReloadPlan:
+    services: set[str] = field(default_factory=set)
+    restart_paths: list[str] = field(default_factory=list)
+
+    def add(self, service: str) -> None:
+        self.services.add(service)
+
+    def require_restart(self, path: str) -> None:
+        if path not in self.restart_paths:
+            self.restart_paths.append(path)
+
+    def calls(self) -> list[str]:
+        """Services to call; `reload_all` already covers every other reload."""
+
+        if RELOAD_ALL in self.services:
+            return [RELOAD_ALL]
+        return sorted(self.services)
+
+
+@dataclass
+class _LoadedConfig:
+    """Files Home Assistant loads, found by following `!include` tags."""
+
+    files: set[str] = field(default_factory=set)
+    directories: set[str] = field(default_factory=set)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self.files or any(
+            str(path).startswith(directory + "/") for directory in self.directories
+        )
+
+
+class ReloadPlanner:
+    """Map deployed changes to the Home Assistant reload services they need.
+
+    Dedicated files (automations.yaml, scripts/, themes/, ...) map to their
+    integration. For configuration.yaml and packages/ the top-level domains
+    of the previous and new document are compared, so only sections that
+    actually changed are reloaded. Other YAML files that Home Assistant
+    loads (reachable from configuration.yaml through `!include` tags) are
+    reported as requiring a restart; the rest (ESPHome configs,
+    dashboards, CI workflows, ...) need nothing.
+    """
+
+    def __init__(
+        self,
+        read_new: Callable[[str], str | None],
+        prefix: str = "",
+        config_dir: Path | None = None,
+    ) -> None:
+        self._read_new = read_new
+        # Location of the repository root inside the Home Assistant config.
+        self._prefix = prefix.strip("/")
+        # Read for files outside the repository, e.g. configuration.yaml.
+        self._config_dir = config_dir
+
+    def plan(
+        self,
+        changes: Sequence[FileChange],
+        read_previous: Callable[[str], str | None],
+    ) -> ReloadPlan:
+        plan = ReloadPlan()
+
+        @cache
+        def loaded() -> _LoadedConfig:
+            # Files deleted by this change are only reachable from the old tree.
+            return self._loaded_config(
+                self._reader(self._read_new), self._reader(read_previous)
+            )
+
+        for change in changes:
+            old_path = None if change.change_type == "added" else change.previous_path or change.path
+            new_path = None if change.change_type == "deleted" else change.path
+            compare_old = old_path if old_path and self._classify(plan, old_path, loaded) else None
+            if new_path == old_path:
+                compare_new = compare_old
+            else:
+                compare_new = (
+                    new_path if new_path and self._classify(plan, new_path, loaded) else None
+                )
+            if compare_old or compare_new:
+                self._plan_sections(plan, compare_old, compare_new, read_previous)
+        return plan
+
+    async def apply(self, plan: ReloadPlan, client: HAEventClient) -> ReloadOutcome:
+        calls = plan.calls()
+        results = await asyncio.gather(
+            *(client.call_service(*service.split(".", 1)) for service in calls),
+            return_exceptions=True,
+        )
+        outcome = ReloadOutcome(
+            restart_required=bool(plan.restart_paths),
+            restart_paths=plan.restart_paths,
+        )
+        for service, result in zip(calls, results):
+            if isinstance(result, BaseException):
+                _LOGGER.error("Reload %s failed: %s", service, result)
+                outcome.failed.append(service)
+            else:
+                outcome.services.append(service)
+        if outcome.services:
+            _LOGGER.info("Reloaded %s", ", ".join(outcome.services))
+        if outcome.restart_required:
+            _LOGGER.warning(
+                "Home Assistant restart required for: %s", ", ".join(plan.restart_paths)
+            )
+        return outcome
+
+    def _config_path(self, path: str) -> str:
+        return f"{self._prefix}/{path}" if self._prefix else path
+
+    def _reader(
+        self, read_repo: Callable[[str], str | None]
+    ) -> Callable[[str], str | None]:
+        """Read a config-relative path from the repository or the config directory."""
+
+        def read(path: str) -> str | None:
+            text = None
+            if not self._prefix:
+                text = read_repo(path)
+            elif path.startswith(self._prefix + "/"):
+                text = read_repo(path[len(self._prefix) + 1 :])
+            if text is None and self._config_dir is not None:
+                try:
+                    text = (self._config_dir / path).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    return None
+            return text
+
+        return read
+
+    @staticmethod
+    def _loaded_config(*readers: Callable[[str], str | None]) -> _LoadedConfig:
+        loaded = _LoadedConfig()
+        for read in readers:
+            pending = ["configuration.yaml"]
+            seen: set[str] = set()
+            while pending:
+                path = pending.pop()
+                if path in seen:
+                    continue
+                seen.add(path)
+                loaded.files.add(path)
+                try:
+                    includes = _includes(read(path))
+                except (yaml.YAMLError, ValueError) as exc:
+                    _LOGGER.debug("Cannot follow includes of %s: %s", path, exc)
+                    continue
+                for tag, target in includes:
+                    # Includes are relative to the including file.
+                    target = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+                    if target.startswith(("../", "/")) or target == "..":
+                        continue
+                    if tag == "!include":
+                        pending.append(target)
+                    else:
+                        loaded.directories.add(target)
+        return loaded
+
+    def _classify(
+        self, plan: ReloadPlan, path: str, loaded: Callable[[], _LoadedConfig]
+    ) -> bool:
+        """Add what `path` needs to `plan`; True when its sections must be compared."""
+
+        path = self._config_path(path)
+        if path.startswith(_RESTART_PREFIXES):
+            plan.require_restart(path)
+            return False
+        for prefix, services in _DIRECTORY_SERVICES.items():
+            if path.startswith(prefix + "/"):
+                for service in services:
+                    plan.add(service)
+                return False
+        if not path.endswith(_YAML_SUFFIXES):
+            # Assets, documentation, dashboard resources: nothing to reload.
+            return False
+        parts = PurePosixPath(path).parts
+        name = PurePosixPath(parts[0]).stem
+        if name == "configuration" or (name == "packages" and len(parts) > 1):
+            return True
+        if name == "secrets":
+            # Secrets may be used by any integration.
+            plan.add(RELOAD_ALL)
+            plan.require_restart(path)
+        elif name.startswith("customize"):
+            plan.add(CORE_CONFIG)
+        elif (domain := _domain_for(name)) is not None:
+            plan.add(f"{domain}.reload")
+        elif path in loaded():
+            plan.require_restart(path)
+        return False
+
+    def _plan_sections(
+        self,
+        plan: ReloadPlan,
+        old_path: str | None,
+        new_path: str | None,
+        read_previous: Callable[[str], str | None],
+    ) -> None:
+        """Reload the top-level domains that differ between both documents."""
+
+        label = self._config_path(new_path or old_path or "")
+        try:
+            new = _load(self._read_new(new_path)) if new_path else {}
+            old = _load(read_previous(old_path)) if old_path else {}
+        except (yaml.YAMLError, UnicodeDecodeError, ValueError) as exc:
+            _LOGGER.debug("Cannot compare %s, assuming restart: %s", label, exc)
+            plan.require_restart(label)
+            return
+        for domain in sorted(set(old) | set(new)):
+            before, after = old.get(domain), new.get(domain)
+            if before == after:
+                continue
+            if domain == "homeassistant":
+                changed = _changed_keys(before, after)
+                plan.add(RELOAD_ALL if "packages" in changed else CORE_CONFIG)
+                continue
+            if domain in RELOADABLE_DOMAINS:
+                plan.add(f"{domain}.reload")
+                continue
+            platforms = _changed_platforms(before, after)
+            if platforms and platforms <= RELOADABLE_DOMAINS:
+                for platform in sorted(platforms):
+                    plan.add(f"{platform}.reload")
+            else:
+                plan.require_restart(f"{label}#{domain}")
+
+
+def _domain_for(name: str) -> str | None:
+    for candidate in (name, name[:-1] if name.endswith("s") else name):
+        if candidate in RELOADABLE_DOMAINS:
+            return candidate
+    return None
+
+
+class _IncludeLoader(HomeAssistantLoader):
+    """Records the `!include*` tags of a document while loading it."""
+
+    def __init__(self, stream: str) -> None:
+        super().__init__(stream)
+        self.includes: list[tuple[str, str]] = []
+
+
+def _construct_include(loader: _IncludeLoader, node: yaml.Node) -> Any:
+    if isinstance(node, yaml.ScalarNode):
+        loader.includes.append((node.tag, str(loader.construct_scalar(node))))
+    return None
+
+
+for _tag in ("!include", *_INCLUDE_DIR_TAGS):
+    _IncludeLoader.add_constructor(_tag, _construct_include)
+
+
+def _includes(text: str | None) -> list[tuple[str, str]]:
+    """`(tag, path)` of every include in `text`."""
+
+    if text is None:
+        return []
+    loader = _IncludeLoader(text)
+    try:
+        loader.get_single_data()
+    finally:
+        loader.dispose()
+    return loader.includes
+
+
+def _load(text: str | None) -> dict[str, Any]:
+    if text is None:
+        raise ValueError("content unavailable")
+    data = yaml.load(text, Loader=HomeAssistantLoader)  # noqa: S506 - safe loader subclass
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("top level is not a mapping")
+    return {str(key): value for key, value in data.items()}
+
+
+def _changed_keys(before: Any, after: Any) -> set[str]:
+    before = before if isinstance(before, dict) else {}
+    after = after if isinstance(after, dict) else {}
+    return {key for key in set(before) | set(after) if before.get(key) != after.get(key)}
+
+
+def _changed_platforms(before: Any, after: Any) -> set[str] | None:
+    """Platforms of list entries that differ, or None when not a platform list."""
+
+    old, new = _platform_entries(before), _platform_entries(after)
+    if old is None or new is None:
+        return None
+    return {platform for _, platform in old.symmetric_difference(new)}
+
+
+def _platform_entries(value: Any) -> set[tuple[str, str]] | None:
+    if value is None:
+        return set()
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        return None
+    entries: set[tuple[str, str]] = set()
+    for item in value:
+        if not isinstance(item, dict) or "platform" not in item:
+            return None
+        entries.add((json.dumps(item, sort_keys=True, default=str), str(item["platform"])))
+    return entries
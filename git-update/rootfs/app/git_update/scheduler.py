@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from .config import Options
+from .models import ScheduleStats
+
+# Interval factor after a sync that found changes, and while idle.
+_ACTIVE_FACTOR = 0.5
+_IDLE_FACTOR = 1.5
+# Outcomes that mean the remote moved, even if the new commit was rejected.
+_ACTIVE_OUTCOMES = frozenset({"deployed", "deployment_error", "config_invalid"})
+
+
+class PollScheduler:
+    """Adaptive delay until the next scheduled poll of one source.
+
+    The interval starts at `poll_interval`, halves after every sync that
+    found changes and grows by half after idle ones, bounded by
+    `poll_interval_min` and `poll_interval_max`. Consecutive errors back
+    off exponentially up to the maximum. Each delay is spread by
+    `poll_jitter` so sources and add-on instances do not poll in lockstep.
+    """
+
+    def __init__(self, options: Options, rng: random.Random | None = None) -> None:
+        self._min = options.poll_interval_min
+        self._max = options.poll_interval_max
+        self._jitter = options.poll_jitter
+        self._rng = rng or random.Random()
+        self._interval = float(min(max(options.poll_interval, self._min), self._max))
+        self._failures = 0
+        self.due = time.monotonic()
+        self.stats = ScheduleStats(
+            interval=self._interval, next_run=datetime.now(timezone.utc)
+        )
+
+    def record(self, outcome: str) -> float:
+        """Plan the next poll after a sync with `outcome`; returns the delay."""
+
+        if outcome == "error":
+            self._failures += 1
+            delay = min(self._interval * 2**self._failures, self._max)
+        else:
+            self._failures = 0
+            factor = _ACTIVE_FACTOR if outcome in _ACTIVE_OUTCOMES else _IDLE_FACTOR
+            self._interval = min(max(self._interval * factor, self._min), self._max)
+            delay = self._interval
+        if self._jitter:
+            delay *= 1 + self._rng.uniform(-self._jitter, self._jitter)
+        self.due = time.monotonic() + delay
+        self.stats = ScheduleStats(
+            interval=self._interval,
+            next_run=datetime.now(timezone.utc) + timedelta(seconds=delay),
+            consecutive_failures=self._failures,
+        )
+        return delay
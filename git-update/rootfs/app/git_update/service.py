@@ -2,53 +2,272 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from contextlib import AbstractContextManager, nullcontext
 from datetime import datetime, timezone
-from typing import Any
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
 
-from .config import Options, load_options
+import git
+
+from .broadcast import StatusBroadcaster
+from .check_policy import ConfigCheckPolicy
+from .config import DEFAULT_SOURCE, HA_CONFIG_DIR, REPO_DIR, STATE_DIR, Options, load_options
 from .deployer import DeploymentError, FileDeployer
-from .git_client import GitRepoManager
-from .models import StatusResponse, SyncMetadata
+from .drift import DriftMonitor
+from .git_client import GitRepoManager, GitSyncResult
+from .history import SyncHistory
+from .maintenance import RepoMaintenance
+from .metrics import SYNC_SECONDS, SYNCS_TOTAL, collect_phases, phase_timer
+from .models import (
+    DriftStats,
+    FileChange,
+    HistoryEntry,
+    MaintenanceStats,
+    ReloadOutcome,
+    StatusResponse,
+    SyncMetadata,
+)
 from .notifier import Notifier
+from .reload_planner import ReloadPlanner
+from .scheduler import PollScheduler
 
 _LOGGER = logging.getLogger(__name__)
+# Upper bound on how far repeated debounced triggers may push a queued sync
+# back, expressed as a multiple of the debounce window.
+_DEBOUNCE_MAX_FACTOR = 4
+# Idle polls (and polls still pointing at a rolled back commit) are not
+# worth a history entry.
+_UNRECORDED_OUTCOMES = frozenset({"unchanged", "rejected"})
+# Sync reasons used as metric labels; POST /sync accepts any text, which
+# only goes into the history.
+_REASON_LABELS = frozenset(
+    {"manual", "scheduled", "startup", "webhook:github", "webhook:gitea", "webhook:gitlab"}
+)
 
 
-class GitUpdateService:
-    def __init__(self, options: Options | None = None) -> None:
-        self.options = options or load_options()
-        self.repo = GitRepoManager(self.options)
-        self.deployer = FileDeployer(self.options)
-        self.notifier = Notifier(self.options)
-        self.status = StatusResponse(healthy=True, last_sync=None, pending_reason=None, error=None)
+class SyncSource:
+    """One repository deployed to one target path.
+
+    Each source has its own checkout, state directory, sync queue and
+    status. Sources share the notifier and the scheduler's concurrency
+    limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options: Options,
+        notifier: Notifier,
+        *,
+        sync_slots: asyncio.Semaphore,
+        apply_lock: asyncio.Lock,
+        on_status: Callable[[], None] | None = None,
+        repo_dir: Path = REPO_DIR,
+        state_dir: Path = STATE_DIR,
+    ) -> None:
+        self.name = name
+        self.options = options
+        self.notifier = notifier
+        self.repo = GitRepoManager(options, repo_dir, state_dir)
+        self.deployer = FileDeployer(options, repo_dir, state_dir)
+        self.config_check = ConfigCheckPolicy(options, state_dir)
+        self.reloads = _reload_planner(options, self.repo)
+        self.history = SyncHistory(state_dir / "history.sqlite3", options.history_size)
+        self.schedule = PollScheduler(options)
+        self.maintenance = RepoMaintenance(options, self.repo, state_dir)
+        self.drift = (
+            DriftMonitor(self.deployer, self._on_drift)
+            if options.drift_policy != "off"
+            else None
+        )
+        self._status = StatusResponse(source=name, healthy=True, schedule=self.schedule.stats)
+        self._on_status = on_status
         self._sync_lock = asyncio.Lock()
+        self._sync_slots = sync_slots
+        self._apply_lock = apply_lock
         self._stop = asyncio.Event()
+        self._pending_reasons: list[str] = []
+        self._pending_waiters: list[asyncio.Future[None]] = []
+        self._pending_since: float | None = None
+        self._pending_due: float | None = None
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
 
-    async def run(self) -> None:
-        if self.options.notify_on_startup:
-            await self.trigger_sync("startup")
+    @property
+    def status(self) -> StatusResponse:
+        return self._status
+
+    @status.setter
+    def status(self, value: StatusResponse) -> None:
+        self._status = value
+        if self._on_status is not None:
+            self._on_status()
+
+    def start(self) -> None:
+        """Start watching deployed files for drift."""
+
+        if self.drift is not None:
+            self.drift.start()
+
+    async def trigger_sync(self, reason: str) -> None:
+        """Run a sync as soon as possible and wait until it has finished."""
+
+        await asyncio.shield(self.request_sync(reason))
+
+    def request_sync(self, reason: str, debounce: float = 0) -> asyncio.Future[None]:
+        """Queue a sync without waiting for it.
+
+        A positive `debounce` delays the queued sync until no further
+        debounced triggers arrived for that many seconds (bounded by
+        `_DEBOUNCE_MAX_FACTOR` windows). Returns a future that resolves once
+        the sync covering this trigger has completed.
+        """
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        candidate = now + debounce
+        if self._pending_due is None or self._pending_since is None:
+            self._pending_since = now
+            self._pending_due = candidate
+        elif debounce <= 0:
+            self._pending_due = min(self._pending_due, candidate)
+        else:
+            latest = self._pending_since + debounce * _DEBOUNCE_MAX_FACTOR
+            self._pending_due = min(max(self._pending_due, candidate), latest)
+        if reason not in self._pending_reasons:
+            self._pending_reasons.append(reason)
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._pending_waiters.append(waiter)
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._sync_worker())
+        return waiter
+
+    async def _sync_worker(self) -> None:
+        loop = asyncio.get_running_loop()
         while not self._stop.is_set():
-            await self.trigger_sync("scheduled")
-            try:
-                await asyncio.wait_for(
-                    self._stop.wait(), timeout=self.options.poll_interval
-                )
-            except asyncio.TimeoutError:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._pending_due is None:
                 continue
+            delay = self._pending_due - loop.time()
+            if delay > 0:
+                # Re-evaluate the deadline whenever another trigger arrives.
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.set()
+                if self._pending_due - loop.time() > 0:
+                    continue
 
-    async def trigger_sync(self, reason: str) -> None:
+            reasons = self._pending_reasons
+            waiters = self._pending_waiters
+            self._pending_reasons = []
+            self._pending_waiters = []
+            self._pending_since = None
+            self._pending_due = None
+            self._wakeup.clear()
+            if len(reasons) > 1:
+                _LOGGER.info("Coalesced sync triggers: %s", ", ".join(reasons))
+            try:
+                async with self._sync_slots, self._sync_lock:
+                    await self._execute_sync(reasons[0], reasons)
+            finally:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    async def rollback(self, commit: str | None = None) -> StatusResponse:
+        """Redeploy an earlier commit from the local repository.
+
+        Defaults to the previous deployment. Raises `RollbackError` when
+        there is nothing to roll back to.
+        """
+
+        # Skips the shared sync slots so recovery never queues behind other
+        # sources; the source's own lock still orders it with its syncs.
         async with self._sync_lock:
-            await self._execute_sync(reason)
+            target = await asyncio.to_thread(self.repo.rollback_target, commit)
+            await self._execute_sync("rollback", rollback_to=target)
+        return self.status
 
-    async def _execute_sync(self, reason: str) -> None:
-        self.status = StatusResponse(
+    async def maintain(self, *, force: bool = False) -> MaintenanceStats | None:
+        """Run git maintenance if it is due and no sync is waiting.
+
+        Maintenance holds the sync lock like a sync does, so the two never
+        overlap; a trigger arriving meanwhile waits for it to finish.
+        Returns None when nothing ran.
+        """
+
+        if not force and (
+            not self.maintenance.due()
+            or self._pending_due is not None
+            or self._sync_lock.locked()
+        ):
+            return None
+        async with self._sync_slots, self._sync_lock:
+            stats = await asyncio.to_thread(self.maintenance.run)
+        self.status = self.status.model_copy(update={"maintenance": stats})
+        return stats
+
+    async def _execute_sync(
+        self,
+        reason: str,
+        merged_reasons: list[str] | None = None,
+        *,
+        rollback_to: str | None = None,
+    ) -> None:
+        merged_reasons = merged_reasons or [reason]
+        self._set_status(
             healthy=self.status.healthy,
             last_sync=self.status.last_sync,
             pending_reason=reason,
             error=self.status.error,
         )
+        started = time.perf_counter()
+        with collect_phases() as timings:
+            outcome, metadata = await self._run_sync(reason, merged_reasons, rollback_to)
+        duration = time.perf_counter() - started
+        # Any sync, scheduled or not, postpones the next poll.
+        self.schedule.record(outcome)
+        self.status = self.status.model_copy(update={"schedule": self.schedule.stats})
+        SYNCS_TOTAL.inc(
+            source=self.name, reason=_reason_label(reason, rollback_to), outcome=outcome
+        )
+        SYNC_SECONDS.observe(duration, source=self.name, outcome=outcome)
+        if outcome in _UNRECORDED_OUTCOMES or not self.history.enabled:
+            return
+        if metadata is None:
+            metadata = SyncMetadata(
+                branch=self.options.branch,
+                synced_at=datetime.now(timezone.utc),
+                reason=reason,
+                merged_reasons=merged_reasons,
+            )
+        entry = HistoryEntry(
+            **metadata.model_dump(),
+            outcome=outcome,
+            error=self.status.error,
+            duration=duration,
+            timings=timings,
+        )
+        await asyncio.to_thread(self.history.record, entry)
+
+    async def _run_sync(
+        self, reason: str, merged_reasons: list[str], rollback_to: str | None = None
+    ) -> tuple[str, SyncMetadata | None]:
+        """Sync (or roll back), deploy, validate and notify; returns the outcome label."""
+
+        outcome = "error"
+        metadata: SyncMetadata | None = None
         try:
-            result = await asyncio.to_thread(self.repo.sync)
+            if rollback_to is None:
+                result = await asyncio.to_thread(self.repo.sync)
+            else:
+                result = await asyncio.to_thread(self.repo.rollback, rollback_to)
             metadata = SyncMetadata(
                 commit_before=result.before,
                 commit_after=result.after,
@@ -56,54 +275,38 @@ class GitUpdateService:
                 changes=result.changes,
                 synced_at=datetime.now(timezone.utc),
                 reason=reason,
+                merged_reasons=merged_reasons,
                 initial_sync=result.initial,
             )
-            if result.changes:
-                try:
-                    await asyncio.to_thread(self.deployer.deploy, result.changes)
-                except DeploymentError as exc:
-                    _LOGGER.error("Deployment failed: %s", exc)
-                    await self.notifier.notify_error(
-                        "deployment_error",
-                        str(exc),
-                        result.branch,
-                        result.after,
-                    )
-                    self.status = StatusResponse(
-                        healthy=False,
-                        last_sync=metadata,
-                        pending_reason=None,
-                        error=str(exc),
-                    )
-                    return
-
-                # Validate Home Assistant configuration and wait for the outcome
-                is_valid, validation_error = await self.notifier._ha.check_config()
-                if is_valid is False:
-                    error_msg = "Home Assistant configuration invalid"
-                    if validation_error:
-                        error_msg = f"{error_msg}: {validation_error}"
-                    _LOGGER.error(error_msg)
-                    await self.notifier.notify_error(
-                        "config_validation_error",
-                        error_msg,
-                        result.branch,
-                        result.after,
-                    )
-                    self.status = StatusResponse(
-                        healthy=False,
-                        last_sync=metadata,
-                        pending_reason=None,
-                        error=error_msg,
-                    )
-                    return
-                if is_valid is None:
-                    _LOGGER.warning(
-                        "Skipped Home Assistant config validation (reason=%s)",
-                        validation_error or "unknown",
-                    )
+            if rollback_to is None and not result.changes and self.repo.rejected_commit:
+                # The remote still points at a rolled back commit; keep reporting it.
+                outcome = "rejected"
+                self._set_status(
+                    healthy=self.status.healthy,
+                    last_sync=self.status.last_sync,
+                    pending_reason=None,
+                    error=self.status.error,
+                )
+                return outcome, metadata
+            if result.changes or rollback_to is not None:
+                # Home Assistant validates the combined configuration of all
+                # sources, so deployments are applied one source at a time.
+                async with self._apply_lock:
+                    with self._deploying():
+                        failure = await self._apply(
+                            result, metadata, rollback=rollback_to is not None
+                        )
+                if failure is not None:
+                    return failure, metadata
+                await asyncio.to_thread(
+                    self.repo.record_deployment, result, rollback=rollback_to is not None
+                )
 
-            self.status = StatusResponse(healthy=True, last_sync=metadata, pending_reason=None, error=None)
+            if rollback_to is not None:
+                outcome = "rolled_back"
+            else:
+                outcome = "deployed" if result.changes else "unchanged"
+            self._set_status(healthy=True, last_sync=metadata, pending_reason=None, error=None)
             
             if result.changes:
                 _LOGGER.info("Sync completed: %d file(s) changed on branch %s @ %s", 
@@ -112,19 +315,272 @@ class GitUpdateService:
                 _LOGGER.debug("Sync completed: no changes detected on branch %s @ %s",
                              result.branch, result.after[:7] if result.after else "unknown")
             
-            should_notify = bool(result.changes) or (
-                self.options.notify_on_startup and reason == "startup"
+            should_notify = bool(result.changes) or rollback_to is not None or (
+                self.options.notify_on_startup and "startup" in merged_reasons
             )
             if should_notify:
-                await self.notifier.notify(result.changes, result.branch, result.after, reason)
+                with phase_timer("notify"):
+                    await self.notifier.notify(
+                        result.changes,
+                        result.branch,
+                        result.after,
+                        reason,
+                        metadata.reload,
+                        source=self.name,
+                    )
         except Exception as exc:  # noqa: BLE001
+            outcome = "error"
             _LOGGER.exception("Sync failed: %s", exc)
-            self.status = StatusResponse(
+            # Files that made it into place stay deployed.
+            await asyncio.to_thread(self.deployer.commit)
+            self._set_status(
                 healthy=False,
                 last_sync=self.status.last_sync,
                 pending_reason=None,
                 error=str(exc),
             )
+        return outcome, metadata
+
+    async def _apply(
+        self, result: GitSyncResult, metadata: SyncMetadata, *, rollback: bool = False
+    ) -> str | None:
+        """Deploy, validate and reload; returns the outcome label on failure."""
+
+        # A failed rollback only restores the tree; the target is not at fault
+        # for what the branch points to.
+        rejected = None if rollback else result.after
+        try:
+            await asyncio.to_thread(self.deployer.deploy, result.changes)
+        except DeploymentError as exc:
+            _LOGGER.error("Deployment failed: %s", exc)
+            await asyncio.to_thread(self.repo.reject, rejected, result.before)
+            await self.notifier.notify_error(
+                "deployment_error",
+                str(exc),
+                result.branch,
+                result.after,
+                source=self.name,
+            )
+            self._set_status(
+                healthy=False,
+                last_sync=metadata,
+                pending_reason=None,
+                error=str(exc),
+            )
+            return "deployment_error"
+
+        # Validate Home Assistant configuration and wait for the outcome
+        decision = self.config_check.decide(result.changes, result.tree)
+        if decision.run:
+            with phase_timer("check_config"):
+                is_valid, validation_error = await self.notifier._ha.check_config()
+            self.config_check.record(result.tree, is_valid)
+        else:
+            _LOGGER.info("Skipping Home Assistant config check: %s", decision.reason)
+            is_valid, validation_error = True, None
+        if is_valid is False:
+            error_msg = "Home Assistant configuration invalid"
+            if validation_error:
+                error_msg = f"{error_msg}: {validation_error}"
+            if await asyncio.to_thread(self.deployer.rollback):
+                await asyncio.to_thread(self.repo.reject, rejected, result.before)
+                error_msg = f"{error_msg} (deployment rolled back)"
+            _LOGGER.error(error_msg)
+            await self.notifier.notify_error(
+                "config_validation_error",
+                error_msg,
+                result.branch,
+                result.after,
+                source=self.name,
+            )
+            self._set_status(
+                healthy=False,
+                last_sync=metadata,
+                pending_reason=None,
+                error=error_msg,
+            )
+            return "config_invalid"
+        if is_valid is None:
+            _LOGGER.warning(
+                "Skipped Home Assistant config validation (reason=%s)",
+                validation_error or "unknown",
+            )
+        await asyncio.to_thread(self.deployer.commit)
+        if is_valid and not result.initial:
+            metadata.reload = await self._reload(result.before, result.changes)
+        return None
+
+    async def _reload(
+        self, before: str | None, changes: list[FileChange]
+    ) -> ReloadOutcome | None:
+        """Reload the integrations affected by `changes`."""
+
+        if before is None or self.reloads is None:
+            return None
+        plan = await asyncio.to_thread(
+            self.reloads.plan, changes, partial(self.repo.read_file, before)
+        )
+        if not plan.services and not plan.restart_paths:
+            return None
+        with phase_timer("reload"):
+            return await self.reloads.apply(plan, self.notifier._ha)
+
+    def _deploying(self) -> AbstractContextManager[None]:
+        """Keep the drift monitor from reporting our own writes."""
+
+        return self.drift.paused() if self.drift is not None else nullcontext()
+
+    async def _on_drift(self, drift: DriftStats) -> None:
+        self.status = self.status.model_copy(update={"drift": drift})
+        await self.notifier.notify_drift(drift, self.options.branch, source=self.name)
+        if drift.count and self.options.drift_policy == "redeploy":
+            await self._repair_drift()
+
+    async def _repair_drift(self) -> None:
+        """Redeploy drifted files from the deployed commit."""
+
+        assert self.drift is not None
+        async with self._sync_lock, self._apply_lock:
+            manifest = self.deployer.manifest
+            drifted = [path for path in self.drift.drifted() if manifest.get(path) is not None]
+            if not drifted:
+                return
+            try:
+                # HEAD is the deployed commit; it also knows the file modes.
+                changes = await asyncio.to_thread(self.repo.head_files, drifted)
+            except git.GitCommandError as exc:
+                _LOGGER.error("Failed to look up drifted files: %s", exc)
+                return
+            if not changes:
+                return
+            with self._deploying():
+                try:
+                    report = await asyncio.to_thread(self.deployer.deploy, changes)
+                    await asyncio.to_thread(self.deployer.commit)
+                except DeploymentError as exc:
+                    _LOGGER.error("Failed to redeploy drifted files: %s", exc)
+                    return
+        _LOGGER.info("Redeployed %d drifted file(s)", report.copied)
+        self.drift.record_repair(report.copied)
+        self.status = self.status.model_copy(update={"drift": self.drift.stats})
+
+    def _set_status(
+        self,
+        *,
+        healthy: bool,
+        last_sync: SyncMetadata | None,
+        pending_reason: str | None,
+        error: str | None,
+    ) -> None:
+        self.status = StatusResponse(
+            source=self.name,
+            healthy=healthy,
+            last_sync=last_sync,
+            pending_reason=pending_reason,
+            error=error,
+            remote_probe=self.repo.probe_stats.model_copy(),
+            config_check=self.config_check.stats.model_copy(),
+            schedule=self.schedule.stats,
+            rejected_commit=self.repo.rejected_commit,
+            drift=self.drift.stats if self.drift is not None else None,
+            maintenance=self.maintenance.stats if self.maintenance.enabled else None,
+        )
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.cancel()
+        self.history.close()
+
+
+class GitUpdateService:
+    """Schedules syncs of every configured source.
+
+    Sources sync concurrently, at most `max_concurrent_syncs` at a time;
+    their target paths are checked for overlaps when the options load.
+    """
+
+    def __init__(self, options: Options | None = None) -> None:
+        self.options = options or load_options()
+        self.events = StatusBroadcaster()
+        self.notifier = Notifier(self.options, on_outbox_change=self._publish_status)
+        sync_slots = asyncio.Semaphore(self.options.max_concurrent_syncs)
+        apply_lock = asyncio.Lock()
+        self.sources: dict[str, SyncSource] = {}
+        for name, source_options in self.options.source_options().items():
+            if name == DEFAULT_SOURCE:
+                repo_dir, state_dir = REPO_DIR, STATE_DIR
+            else:
+                repo_dir = REPO_DIR.parent / "sources" / name
+                state_dir = STATE_DIR / "sources" / name
+            self.sources[name] = SyncSource(
+                name,
+                source_options,
+                self.notifier,
+                sync_slots=sync_slots,
+                apply_lock=apply_lock,
+                on_status=self._publish_status,
+                repo_dir=repo_dir,
+                state_dir=state_dir,
+            )
+        self._stop = asyncio.Event()
+        self._publish_status()
+
+    @property
+    def status(self) -> StatusResponse:
+        """Status of the default source; `healthy` covers every source."""
+
+        update: dict[str, Any] = {"outbox": self.notifier.outbox_stats}
+        if len(self.sources) > 1:
+            update["healthy"] = all(source.status.healthy for source in self.sources.values())
+            update["sources"] = {name: source.status for name, source in self.sources.items()}
+        return self.sources[DEFAULT_SOURCE].status.model_copy(update=update)
+
+    def _publish_status(self) -> None:
+        self.events.publish(self.status)
+
+    async def run(self) -> None:
+        self.notifier.start()
+        for source in self.sources.values():
+            source.start()
+        await asyncio.gather(*(self._poll(source) for source in self.sources.values()))
+
+    async def _poll(self, source: SyncSource) -> None:
+        """Sync `source` whenever its scheduler says the next poll is due."""
+
+        # The first run doubles as the startup sync.
+        reason = "startup"
+        while not self._stop.is_set():
+            await source.trigger_sync(reason)
+            reason = "scheduled"
+            # Right after a poll is the longest idle window until the next one.
+            await source.maintain()
+            # Webhook and manual syncs move `due` while we wait.
+            while (delay := source.schedule.due - time.monotonic()) > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                    return
+                except asyncio.TimeoutError:
+                    continue
+
+    async def trigger_sync(self, reason: str, sources: list[str] | None = None) -> None:
+        """Sync `sources` (default: all) as soon as possible and wait for them.
+
+        Callers that arrive while another sync of a source is queued or
+        running are folded into a single follow-up sync.
+        """
+
+        await asyncio.shield(self.request_sync(reason, sources=sources))
+
+    def request_sync(
+        self, reason: str, debounce: float = 0, sources: list[str] | None = None
+    ) -> asyncio.Future[list[None]]:
+        """Queue a sync of `sources` (default: all) without waiting for it."""
+
+        names = self.sources if sources is None else sources
+        return asyncio.gather(
+            *(self.sources[name].request_sync(reason, debounce) for name in names)
+        )
 
     def public_config(self) -> dict[str, Any]:
         data = self.options.model_dump()
@@ -133,8 +589,38 @@ class GitUpdateService:
         if data.get("ha_base_url"):
             data["ha_base_url"] = "***redacted***"
         data.pop("mqtt_password", None)
+        data.pop("webhook_secret", None)
+        for source in data.get("sources", []):
+            source.pop("access_token", None)
         return data
 
     async def shutdown(self) -> None:
         self._stop.set()
+        for source in self.sources.values():
+            source.close()
+            if source.drift is not None:
+                await source.drift.aclose()
+        self.events.close()
         await self.notifier.aclose()
+
+
+def _reason_label(reason: str, rollback_to: str | None) -> str:
+    if rollback_to is not None:
+        return "rollback"
+    return reason if reason in _REASON_LABELS else "other"
+
+
+def _reload_planner(options: Options, repo: GitRepoManager) -> ReloadPlanner | None:
+    """Planner for a target inside the Home Assistant config, if reloads are enabled."""
+
+    if not options.auto_reload:
+        return None
+    try:
+        prefix = Path(options.target_path).resolve().relative_to(HA_CONFIG_DIR.resolve())
+    except ValueError:
+        return None
+    return ReloadPlanner(
+        read_new=partial(repo.read_file, "HEAD"),
+        prefix="/".join(prefix.parts),
+        config_dir=HA_CONFIG_DIR,
+    )
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+STAGING_DIR_NAME = ".git_update_staging"
+JOURNAL_NAME = "journal.json"
+
+
+class DeployTransaction:
+    """Stage a deployment next to the target tree and apply it with renames.
+
+    New content is written into a staging area inside the target directory
+    (so every commit step is a same-filesystem `os.replace`). Files that get
+    overwritten or deleted are kept as backups until the transaction is
+    discarded, which allows `rollback` to restore the previous tree.
+    """
+
+    def __init__(self, target_base: Path) -> None:
+        self._target_base = target_base
+        self._root = target_base / STAGING_DIR_NAME / uuid.uuid4().hex
+        self._stage_dir = self._root / "stage"
+        self._backup_dir = self._root / "backup"
+        self._stage_dir.mkdir(parents=True)
+        self._backup_dir.mkdir()
+        self._writes: list[tuple[Path, Path]] = []
+        self._removals: list[Path] = []
+        self._directories: list[Path] = []
+        self._created_dirs: list[Path] = []
+        self._applied: list[tuple[Path, Path | None]] = []
+        self.removed = 0
+
+    def add_write(self, target: Path) -> Path:
+        """Register a write and return the staging path its content goes to."""
+
+        stage = self._stage_dir / str(len(self._writes))
+        self._writes.append((stage, target))
+        return stage
+
+    def add_removal(self, target: Path) -> None:
+        self._removals.append(target)
+
+    def add_directory(self, directory: Path) -> None:
+        self._directories.append(directory)
+
+    def commit(self) -> None:
+        """Move staged files into place, keeping backups of what they replace."""
+
+        self._write_journal()
+        for target in self._removals:
+            if not target.exists():
+                continue
+            backup = self._next_backup()
+            os.replace(target, backup)
+            self._applied.append((target, backup))
+            self.removed += 1
+        for directory in self._directories:
+            self._make_dirs(directory)
+        for stage, target in self._writes:
+            backup = None
+            if target.exists():
+                backup = self._next_backup()
+                try:
+                    os.link(target, backup)
+                except OSError:
+                    shutil.copy2(target, backup)
+            os.replace(stage, target)
+            self._applied.append((target, backup))
+
+    def rollback(self) -> None:
+        """Restore every file touched by `commit` and drop the staging area."""
+
+        for target, backup in reversed(self._applied):
+            try:
+                if backup is not None:
+                    os.replace(backup, target)
+                else:
+                    target.unlink(missing_ok=True)
+            except OSError as exc:
+                _LOGGER.error("Failed to restore %s during rollback: %s", target, exc)
+        for directory in reversed(self._created_dirs):
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        self._applied.clear()
+        self.discard()
+
+    def discard(self) -> None:
+        shutil.rmtree(self._root, ignore_errors=True)
+        try:
+            self._root.parent.rmdir()
+        except OSError:
+            pass
+
+    @classmethod
+    def recover(cls, target_base: Path) -> None:
+        """Finish transactions interrupted by a crash.
+
+        A journal means the commit had started; git already points at the new
+        commit, so the remaining staged files are rolled forward. Staging
+        areas without a journal never touched the target and are dropped.
+        """
+
+        staging = target_base / STAGING_DIR_NAME
+        if not staging.is_dir():
+            return
+        for root in staging.iterdir():
+            journal = root / JOURNAL_NAME
+            if journal.exists():
+                _LOGGER.warning("Completing interrupted deployment %s", root.name)
+                try:
+                    cls._roll_forward(target_base, root, json.loads(journal.read_text("utf-8")))
+                except (OSError, ValueError) as exc:
+                    _LOGGER.error("Failed to complete interrupted deployment: %s", exc)
+            shutil.rmtree(root, ignore_errors=True)
+        try:
+            staging.rmdir()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _roll_forward(target_base: Path, root: Path, journal: dict[str, list]) -> None:
+        written = {rel for _, rel in journal.get("writes", [])}
+        for rel in journal.get("removals", []):
+            if rel not in written:
+                (target_base / rel).unlink(missing_ok=True)
+        for stage_name, rel in journal.get("writes", []):
+            stage = root / "stage" / stage_name
+            if stage.exists():
+                target = target_base / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(stage, target)
+
+    def _write_journal(self) -> None:
+        data = {
+            "removals": [str(path.relative_to(self._target_base)) for path in self._removals],
+            "writes": [
+                [stage.name, str(target.relative_to(self._target_base))]
+                for stage, target in self._writes
+            ],
+        }
+        with (self._root / JOURNAL_NAME).open("w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _make_dirs(self, directory: Path) -> None:
+        missing: list[Path] = []
+        while not directory.exists():
+            missing.append(directory)
+            directory = directory.parent
+        for path in reversed(missing):
+            path.mkdir()
+            self._created_dirs.append(path)
+
+    def _next_backup(self) -> Path:
+        return self._backup_dir / str(len(self._applied))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+# Event header values of push deliveries (GitHub/Gitea, GitLab).
+_PUSH_EVENTS = frozenset({"push", "Push Hook"})
+
+
+class WebhookError(RuntimeError):
+    """Raised when a webhook request cannot be authenticated."""
+
+
+@dataclass
+class WebhookPush:
+    provider: str
+    event: str | None
+    ref: str | None
+
+    @property
+    def is_push(self) -> bool:
+        return self.event in _PUSH_EVENTS and self.ref is not None
+
+
+def verify_webhook(secret: str, headers: Mapping[str, str], body: bytes) -> str:
+    """Authenticate a push webhook and return the provider that sent it.
+
+    GitHub and Gitea sign the raw body with HMAC-SHA256, GitLab sends the
+    shared secret verbatim in `X-Gitlab-Token`. Gitea is checked first
+    because it also sends GitHub's headers.
+    """
+
+    signature = headers.get("x-gitea-signature") or headers.get("x-gogs-signature")
+    if signature or "x-gitea-event" in headers:
+        if signature and hmac.compare_digest(signature, _hmac_sha256(secret, body)):
+            return "gitea"
+        raise WebhookError("Invalid Gitea signature")
+    if signature := headers.get("x-hub-signature-256"):
+        expected = "sha256=" + _hmac_sha256(secret, body)
+        if hmac.compare_digest(signature, expected):
+            return "github"
+        raise WebhookError("Invalid GitHub signature")
+    if token := headers.get("x-gitlab-token"):
+        if hmac.compare_digest(token, secret):
+            return "gitlab"
+        raise WebhookError("Invalid GitLab token")
+    raise WebhookError("Missing webhook signature")
+
+
+def parse_push(provider: str, headers: Mapping[str, str], body: bytes) -> WebhookPush:
+    event = (
+        headers.get("x-github-event")
+        or headers.get("x-gitea-event")
+        or headers.get("x-gitlab-event")
+    )
+    ref: str | None = None
+    try:
+        payload: Any = json.loads(body) if body else {}
+    except ValueError:
+        payload = {}
+    if isinstance(payload, dict) and isinstance(payload.get("ref"), str):
+        ref = payload["ref"]
+    return WebhookPush(provider=provider, event=event, ref=ref)
+
+
+def _hmac_sha256(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+_LOGGER = logging.getLogger(__name__)
+
+# Home Assistant specific tags. They are accepted but never resolved, so an
+# `!include` of a file that is not deployed yet does not fail validation.
+HA_TAGS = (
+    "!include",
+    "!include_dir_list",
+    "!include_dir_named",
+    "!include_dir_merge_list",
+    "!include_dir_merge_named",
+    "!secret",
+    "!env_var",
+    "!input",
+)
+# Bump whenever the accepted syntax changes so cached verdicts are dropped.
+CACHE_VERSION = 1
+
+_BaseLoader: type = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class HomeAssistantLoader(_BaseLoader):  # type: ignore[misc, valid-type]
+    """Safe loader (libyaml-backed when available) that knows HA's tags."""
+
+
+def _construct_tag(loader: yaml.BaseLoader, node: yaml.Node) -> Any:
+    if isinstance(node, yaml.ScalarNode):
+        return loader.construct_scalar(node)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node)
+    return loader.construct_mapping(node)
+
+
+for _tag in HA_TAGS:
+    HomeAssistantLoader.add_constructor(_tag, _construct_tag)
+
+
+class YamlValidator:
+    """Validate YAML documents, memoizing verdicts by git blob id.
+
+    Verdicts (valid, or the parser error) are kept in a size-bounded LRU
+    that is persisted to `cache_path`, so unchanged blobs are never parsed
+    twice, even across restarts.
+    """
+
+    def __init__(self, cache_path: Path, max_entries: int) -> None:
+        self._cache_path = cache_path
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: OrderedDict[str, str | None] = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def uses_libyaml(self) -> bool:
+        return _BaseLoader is not yaml.SafeLoader
+
+    def validate(
+        self,
+        path: Path,
+        blob_sha: str | None = None,
+        *,
+        content: Callable[[], bytes] | None = None,
+    ) -> str | None:
+        """Return the parser error for `path`, or None when it is valid.
+
+        `content` supplies the document when it is not on disk; it is only
+        called on a cache miss.
+        """
+
+        if blob_sha is not None:
+            with self._lock:
+                if blob_sha in self._entries:
+                    self._entries.move_to_end(blob_sha)
+                    self.hits += 1
+                    return self._entries[blob_sha]
+        error = self._parse(content() if content is not None else path)
+        if blob_sha is not None:
+            with self._lock:
+                self.misses += 1
+                self._entries[blob_sha] = error
+                self._dirty = True
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return error
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": CACHE_VERSION, "entries": list(self._entries.items())}
+            self._dirty = False
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=".yaml-cache-", dir=self._cache_path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, separators=(",", ":"))
+            os.replace(tmp_name, self._cache_path)
+        except OSError as exc:
+            _LOGGER.warning("Failed to persist YAML validation cache: %s", exc)
+
+    @staticmethod
+    def _parse(source: Path | bytes) -> str | None:
+        try:
+            if isinstance(source, bytes):
+                yaml.load(source, Loader=HomeAssistantLoader)  # noqa: S506 - safe loader subclass
+            else:
+                with source.open("rb") as handle:
+                    yaml.load(handle, Loader=HomeAssistantLoader)  # noqa: S506
+        except yaml.YAMLError as exc:
+            return str(exc)
+        except UnicodeDecodeError as exc:
+            return f"Invalid encoding: {exc}"
+        return None
+
+    def _load(self) -> OrderedDict[str, str | None]:
+        try:
+            with self._cache_path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return OrderedDict()
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning("Ignoring unreadable YAML cache %s: %s", self._cache_path, exc)
+            return OrderedDict()
+        if data.get("version") != CACHE_VERSION:
+            return OrderedDict()
+        entries: OrderedDict[str, str | None] = OrderedDict(
+            (sha, error) for sha, error in data.get("entries", [])
+        )
+        while len(entries) > self._max_entries:
+            entries.popitem(last=False)
+        return entries
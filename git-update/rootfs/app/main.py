@@ -30,11 +30,12 @@ async def main() -> None:
     service = GitUpdateService(options)
     build_version = os.getenv("ADDON_BUILD_VERSION", "dev")
     logging.getLogger(__name__).info(
-        "Git Update service starting | version=%s | build=%s | repo=%s | branch=%s",
+        "Git Update service starting | version=%s | build=%s | repo=%s | branch=%s | sources=%s",
         __VERSION__,
         build_version,
         service.options.repo_url,
         service.options.branch,
+        ", ".join(service.sources),
     )
     app = create_app(service)
     http_port = service.options.http_api_port